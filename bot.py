@@ -17,6 +17,7 @@ ANY KIND, either express or implied. See the License for the specific language
 governing permissions and limitations under the License.
 """
 
+import asyncio
 import logging
 import os
 import platform
@@ -28,18 +29,39 @@ import topgg
 from beanie.odm.operators.update.general import Set
 from discord.ext import commands
 from html2image import Html2Image
+from motor.motor_asyncio import AsyncIOMotorClient
 
 from constants import GLOBAL_LEADERBOARD_ID
-from database.models import Preference, Server
+from database.cache import preference_cache
+from database.models import Preference
+from database.monitoring import CommandLatencyListener, PoolListener
 from database.setup import initialise_mongodb_conn
+from utils.broadcasts import create_broadcast, schedule_broadcasts, start_broadcast
+from utils.channel_failures import ChannelFailureTracker
+from utils.cleanup import CleanupQueue, schedule_cleanup
+from utils.clusters import StatsUpdateFollower, schedule_follow_stats_updates
+from utils.command_sync import sync_command_tree
+from utils.counters import MemberCounter, schedule_recount, schedule_report_counts
 from utils.dev import ChannelLogger
 from utils.http_client import HttpClient
 from utils.notifications import (
     process_daily_question_and_stats_update,
     schedule_question_and_stats_update,
 )
+from utils.rate_limit import RateLimiter
 from utils.ratings import Ratings, schedule_update_ratings
-from utils.users import delete_user, unlink_user_from_server
+from utils.reconciliation import reconcile_guilds_and_members
+from utils.restart import InFlightCounter, restart
+from utils.retention import schedule_record_retention
+from utils.role_sync import (
+    ROLE_EDITS_BURST,
+    ROLE_EDITS_PER_SECOND,
+    RoleSyncQueue,
+    schedule_role_sync,
+)
+from utils.roles import invalidate_role_index
+from utils.score_table import ScoreTable
+from utils.streaks import backfill_streaks
 
 
 @dataclass
@@ -52,16 +74,48 @@ class Config:
     LOGGING_CHANNEL_ID: int
     DEVELOPER_DISCORD_ID: int
     PRODUCTION: bool
-
-
-class DiscordBot(commands.Bot):
+    MONGODB_MAX_POOL_SIZE: int = 100
+    MONGODB_MIN_POOL_SIZE: int = 0
+    MONGODB_MAX_IDLE_TIME_MS: int | None = None
+    MONGODB_TIMEOUT_MS: int | None = None
+    MONGODB_READ_PREFERENCE: str = "primary"
+    MONGODB_COMPRESSORS: str = "zstd,zlib"
+    # Read daily records from the record buckets instead of the time series.
+    RECORD_BUCKETS: bool = False
+    # "full" caches every member of every guild. "lazy" doesn't chunk guilds or
+    # cache members, and fetches the registered members when they're needed.
+    MEMBER_CACHE: str = "full"
+    # Age in days after which daily records are rolled up into weekly ones, and
+    # after which weekly records are rolled up into monthly ones.
+    RECORD_DAILY_RETENTION_DAYS: int = 62
+    RECORD_WEEKLY_RETENTION_DAYS: int = 365
+    # Total number of shards and the shards run by this process, or `None` to let
+    # the process run every shard, as many as Discord recommends.
+    SHARD_COUNT: int | None = None
+    SHARD_IDS: list[int] | None = None
+    # The cluster (process) ID. Scheduled jobs that must run exactly once, like
+    # the stats update, only run on cluster 0.
+    CLUSTER_ID: int = 0
+
+
+class DiscordBot(commands.AutoShardedBot):
     def __init__(
         self, intents: discord.Intents, config: Config, logger: logging.Logger
     ) -> None:
+        member_cache_options = {}
+        if config.MEMBER_CACHE == "lazy":
+            member_cache_options = {
+                "chunk_guilds_at_startup": False,
+                "member_cache_flags": discord.MemberCacheFlags.none(),
+            }
+
         super().__init__(
             command_prefix=",",
             intents=intents,
             help_command=None,
+            shard_count=config.SHARD_COUNT,
+            shard_ids=config.SHARD_IDS,
+            **member_cache_options,
         )
         """
         Creates custom bot variables so that we can access these variables in cogs
@@ -73,30 +127,53 @@ class DiscordBot(commands.Bot):
         self.html2image = Html2Image(browser_executable=config.BROWSER_EXECUTABLE_PATH)
         self.channel_logger = ChannelLogger(self, self.config.LOGGING_CHANNEL_ID)
         self.ratings = Ratings(self)
+        self.score_table = ScoreTable(self)
+        self.cleanup_queue = CleanupQueue(self)
+        self.member_counter = MemberCounter(self)
+        self.stats_update_follower = StatsUpdateFollower(self)
+        self.channel_failures = ChannelFailureTracker(self)
+        self.role_sync_queue = RoleSyncQueue(self)
+        self.role_edit_limiter = RateLimiter(ROLE_EDITS_PER_SECOND, ROLE_EDITS_BURST)
+        self.reconciled = False
+        # Held while the stats are being updated, so background jobs can stay out
+        # of its way.
+        self.update_lock = asyncio.Lock()
+        self.in_flight_interactions = InFlightCounter()
+        # Set by a graceful restart, for `main.py` to start a new process on exit.
+        self.restarting = False
         self.http_client: HttpClient | None = None
+        self.mongodb_client: AsyncIOMotorClient | None = None
+        self.mongodb_command_listener = CommandLatencyListener()
+        self.mongodb_pool_listener = PoolListener()
         self.topggpy: topgg.DBLClient | None = None
 
-    async def on_autopost_success(self) -> None:
+    @property
+    def is_primary_cluster(self) -> bool:
         """
-        Runs when stats are posted to topgg
+        Whether this process runs the jobs that must run exactly once.
         """
-        self.logger.info(
-            f"Posted server count ({self.topggpy.guild_count}), shard count "
-            f"({self.shard_count})",
-        )
+        return self.config.CLUSTER_ID == 0
 
-        self.logger.info(
-            f"Total bot member count ({ len(set(self.get_all_members()))})"
-        )
+    def owns_guild(self, guild_id: int) -> bool:
+        """
+        Whether a guild is served by one of this process's shards, whether or not the
+        guild is available (or the bot is still in it).
+
+        :param guild_id: The guild's ID.
+        """
+        if self.shard_ids is None:
+            return True
+
+        return (guild_id >> 22) % self.shard_count in self.shard_ids
 
     async def init_topgg(self) -> None:
         """
         Initialises the topgg client.
         """
-        if self.config.PRODUCTION:
-            self.topggpy = topgg.DBLClient(
-                self, self.config.TOPGG_TOKEN, autopost=True, post_shard_count=True
-            )
+        # The guild count of every cluster is posted by the primary cluster, with
+        # `schedule_report_counts`.
+        if self.config.PRODUCTION and self.is_primary_cluster:
+            self.topggpy = topgg.DBLClient(self, self.config.TOPGG_TOKEN)
 
     async def load_cogs(self) -> None:
         """
@@ -120,6 +197,15 @@ class DiscordBot(commands.Bot):
         """
         self.logger.info("Ready")
 
+        # The guilds may have changed while disconnected.
+        self.member_counter.recount()
+
+        # on_ready is also called after reconnecting, but the guilds only need to be
+        # reconciled once per process.
+        if not self.reconciled:
+            self.reconciled = True
+            await reconcile_guilds_and_members(self)
+
     async def setup_hook(self) -> None:
         """
         Called only once to setup the bot.
@@ -133,12 +219,43 @@ class DiscordBot(commands.Bot):
         self.logger.info("-------------------")
 
         self.http_client = HttpClient(self, aiohttp.ClientSession())
-        await initialise_mongodb_conn(self.config.MONGODB_URI, GLOBAL_LEADERBOARD_ID)
+        self.mongodb_client = await initialise_mongodb_conn(
+            self.config.MONGODB_URI,
+            GLOBAL_LEADERBOARD_ID,
+            maxPoolSize=self.config.MONGODB_MAX_POOL_SIZE,
+            minPoolSize=self.config.MONGODB_MIN_POOL_SIZE,
+            maxIdleTimeMS=self.config.MONGODB_MAX_IDLE_TIME_MS,
+            timeoutMS=self.config.MONGODB_TIMEOUT_MS,
+            readPreference=self.config.MONGODB_READ_PREFERENCE,
+            compressors=self.config.MONGODB_COMPRESSORS,
+            event_listeners=[
+                self.mongodb_command_listener,
+                self.mongodb_pool_listener,
+            ],
+        )
+        await self.score_table.load()
         await self.load_cogs()
         await self.init_topgg()
 
-        schedule_update_ratings.start(self)
-        schedule_question_and_stats_update.start(self)
+        # The commands are global, so one cluster syncs them for all.
+        if self.is_primary_cluster:
+            try:
+                await sync_command_tree(self)
+            except discord.errors.HTTPException as e:
+                self.logger.exception(f"Failed to sync the app commands: {e}")
+
+        if self.is_primary_cluster:
+            schedule_update_ratings.start(self)
+            schedule_question_and_stats_update.start(self)
+            schedule_record_retention.start(self)
+        else:
+            schedule_follow_stats_updates.start(self)
+
+        schedule_cleanup.start(self)
+        schedule_role_sync.start(self)
+        schedule_recount.start(self)
+        schedule_report_counts.start(self)
+        schedule_broadcasts.start(self)
 
     async def on_interaction(self, interaction: discord.Interaction) -> None:
         """
@@ -170,8 +287,42 @@ class DiscordBot(commands.Bot):
         self.logger.info(
             f"Guild {guild.name} (ID: {guild.id}) discord account removed",
         )
-        await Preference.find_many(Preference.server_id == guild.id).delete()
-        await Server.find_one(Server.id == guild.id).delete()
+        self.cleanup_queue.remove_server(guild.id)
+        invalidate_role_index(guild.id)
+        self.member_counter.guild_removed(guild)
+
+    async def on_guild_join(self, guild: discord.Guild) -> None:
+        """
+        Called when the bot joins a guild.
+        """
+        self.member_counter.guild_joined(guild)
+
+    async def on_member_join(self, member: discord.Member) -> None:
+        """
+        Called when a member joins a guild.
+        """
+        self.member_counter.member_joined()
+
+    async def on_guild_role_create(self, role: discord.Role) -> None:
+        """
+        Called when a role is created in a guild.
+        """
+        invalidate_role_index(role.guild.id)
+
+    async def on_guild_role_delete(self, role: discord.Role) -> None:
+        """
+        Called when a role is deleted from a guild.
+        """
+        invalidate_role_index(role.guild.id)
+
+    async def on_guild_role_update(
+        self, before: discord.Role, after: discord.Role
+    ) -> None:
+        """
+        Called when a role is updated, e.g. renamed.
+        """
+        if before.name != after.name:
+            invalidate_role_index(after.guild.id)
 
     async def on_raw_member_remove(self, payload: discord.RawMemberRemoveEvent) -> None:
         """
@@ -181,15 +332,8 @@ class DiscordBot(commands.Bot):
             f"Member {payload.user.name} (ID: {payload.user.id}) in Guild "
             f"(ID: {payload.guild_id}) discord account removed",
         )
-        await unlink_user_from_server(payload.guild_id, payload.user.id)
-
-        preferences = await Preference.find_many(
-            Preference.user_id == payload.user.id,
-            Preference.server_id != GLOBAL_LEADERBOARD_ID,
-        ).to_list()
-
-        if len(preferences) == 0:
-            await delete_user(payload.user.id)
+        self.cleanup_queue.unlink_user_from_server(payload.user.id, payload.guild_id)
+        self.member_counter.member_removed()
 
     async def on_member_update(
         self, before: discord.Member, after: discord.Member
@@ -209,6 +353,7 @@ class DiscordBot(commands.Bot):
             Preference.user_id == before.id,
             Preference.server_id == before.guild.id,
         ).update(Set({Preference.name: after.display_name}))
+        preference_cache.invalidate(before.id, before.guild.id)
 
     async def on_user_update(self, before: discord.User, after: discord.User) -> None:
         """
@@ -225,6 +370,7 @@ class DiscordBot(commands.Bot):
             Preference.user_id == before.id,
             Preference.server_id == GLOBAL_LEADERBOARD_ID,
         ).update(Set({Preference.name: after.display_name}))
+        preference_cache.invalidate(before.id, GLOBAL_LEADERBOARD_ID)
 
     async def on_message(self, message: discord.Message) -> None:
         """
@@ -251,27 +397,12 @@ class DiscordBot(commands.Bot):
             if len(message.attachments) == 1:
                 image_url = message.attachments[0].url
 
-            async for server in Server.all():
-                for channel_id in server.channels.maintenance:
-                    channel = self.get_channel(channel_id)
-                    if channel and isinstance(channel, discord.TextChannel):
-                        try:
-                            if image_url:
-                                await channel.send(
-                                    content=announcement + f"\n{image_url}",
-                                )
-                            else:
-                                await channel.send(content=announcement)
-
-                        except discord.errors.Forbidden:
-                            self.logger.info(
-                                f"Forbidden to share announcement to channel with ID: "
-                                f"{channel_id}"
-                            )
+            broadcast = await create_broadcast(announcement, image_url)
+            start_broadcast(self, broadcast)
 
         elif "restart" in message_content:
             self.logger.info("on_message: restart")
-            await self.close()
+            await restart(self)
 
         elif "maintenance" in message_content:
             if "on" in message_content:
@@ -289,8 +420,19 @@ class DiscordBot(commands.Bot):
                 )
 
         elif "sync" in message_content:
-            self.logger.info("on_message: sync")
-            await self.tree.sync()
+            dry_run = "dry-run" in message_content
+            self.logger.info(f"on_message: sync{' dry-run' if dry_run else ''}")
+
+            changes = await sync_command_tree(self, force=not dry_run, dry_run=dry_run)
+            await self.channel_logger.info(
+                f"App command changes{' (dry run)' if dry_run else ''}:\n"
+                + ("\n".join(changes) if changes else "None")
+            )
+
+        elif (
+            "update stats" in message_content or "reset stats" in message_content
+        ) and not self.is_primary_cluster:
+            self.logger.info("on_message: stats are updated by the primary cluster")
 
         elif "update stats" in message_content:
             self.logger.info("on_message: update stats")
@@ -306,16 +448,30 @@ class DiscordBot(commands.Bot):
                 "month" in message_content,
             )
 
+        elif "backfill streaks" in message_content:
+            self.logger.info("on_message: backfill streaks")
+            updated = await backfill_streaks()
+            await self.channel_logger.info(f"Backfilled streaks of {updated} users")
+
     async def close(self):
         """
         Closes the connection to Discord, gracefully closes the session, and reboots
-        the device.
+        the device, unless the bot is restarting in a new process.
         """
         try:
+            if len(self.cleanup_queue):
+                await self.cleanup_queue.flush()
             await self.http_client.session.close()
             await super().close()
+            if self.mongodb_client:
+                self.mongodb_client.close()
         finally:
-            if self.config.PRODUCTION:
+            # Clusters are restarted by the launcher instead.
+            if (
+                self.config.PRODUCTION
+                and self.config.SHARD_IDS is None
+                and not self.restarting
+            ):
                 os.system("sudo reboot")
 
     @staticmethod
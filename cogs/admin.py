@@ -6,6 +6,7 @@ from beanie.odm.operators.update.general import Set
 from discord import app_commands
 from discord.ext import commands
 
+from database.cache import server_cache
 from database.models import Server
 from middleware import defer_interaction, ensure_server_document
 from ui.embeds.settings import timezone_invalid_embed, timezone_updated_embed
@@ -58,8 +59,8 @@ class AdminGroupCog(commands.GroupCog, name="settings"):
             return
 
         # Update server's timezone field.
-        await Server.find_one(Server.id == interaction.guild.id).update(
-            Set({Server.timezone: timezone})
+        await server_cache.update(
+            interaction.guild.id, Set({Server.timezone: timezone})
         )
 
         await interaction.followup.send(embed=timezone_updated_embed())
@@ -43,6 +43,7 @@ class LeaderboardsCog(commands.Cog):
         """
 
         embed, view = await generate_leaderboard_embed(
+            self.bot,
             timeframe.value,
             interaction.guild.id,
             interaction.user.id,
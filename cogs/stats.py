@@ -6,7 +6,8 @@ from discord import app_commands
 from discord.ext import commands
 
 from constants import StatsCardExtensions
-from database.models import Preference, User
+from database.cache import preference_cache
+from database.models import User
 from middleware import defer_interaction
 from ui.embeds.stats import account_hidden_embed, stats_embed
 from ui.embeds.users import account_not_found_embed
@@ -48,9 +49,7 @@ class StatsCog(commands.Cog):
             await interaction.followup.send(embed=account_not_found_embed())
             return
 
-        preference = await Preference.find_one(
-            Preference.user_id == user_id, Preference.server_id == interaction.guild.id
-        )
+        preference = await preference_cache.get(user_id, interaction.guild.id)
 
         if not preference or (user.id != interaction.user.id and not preference.url):
             await interaction.followup.send(embed=account_hidden_embed())
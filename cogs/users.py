@@ -42,7 +42,7 @@ class UsersCog(commands.Cog):
             await login(
                 interaction,
                 interaction.followup.send,
-                user_id,
+                user,
                 server_id,
                 interaction.user.display_name,
             )
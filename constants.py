@@ -42,6 +42,12 @@ class NotificationOptions(Enum):
     WINNERS = "winners"
 
 
+class DeliveryState(Enum):
+    PENDING = "pending"
+    SENT = "sent"
+    FAILED = "failed"
+
+
 GLOBAL_LEADERBOARD_ID = 0
 
 MILESTONE_ROLES = {
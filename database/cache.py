@@ -0,0 +1,204 @@
+from beanie.odm.operators.update import BaseUpdateOperator
+from beanie.operators import In
+from cachetools import TTLCache
+
+from .models import Preference, Server
+
+# Maximum number of (user, server) preferences kept in memory.
+PREFERENCE_CACHE_SIZE = 10_000
+# Maximum number of server documents kept in memory.
+SERVER_CACHE_SIZE = 100_000
+# Time after which cached documents are fetched again. Each cluster has its own
+# caches, and documents can be changed by another cluster (e.g. when it deletes a
+# user), which only invalidates its own caches.
+CACHE_TTL_SECONDS = 10 * 60
+
+
+class ServerCache:
+    """
+    In-process cache of server documents.
+
+    Server documents are tiny and rarely change, so they are kept in memory and
+    every change to them goes through this cache, which writes it to the database
+    and drops the stale cached document. Documents expire after `CACHE_TTL_SECONDS`,
+    in case another cluster changed them.
+    """
+
+    def __init__(self) -> None:
+        # IDs of the servers known to have a server document.
+        self.known_ids: set[int] = set()
+        self.servers: TTLCache[int, Server] = TTLCache(
+            maxsize=SERVER_CACHE_SIZE, ttl=CACHE_TTL_SECONDS
+        )
+
+    async def get(self, server_id: int) -> Server | None:
+        """
+        Get a server document, fetching it from the database if it isn't cached.
+
+        :param server_id: The server's ID.
+
+        :return: The server document, or `None` if it doesn't exist.
+        """
+        if server := self.servers.get(server_id):
+            return server
+
+        server = await Server.get(server_id)
+
+        if server:
+            self.known_ids.add(server_id)
+            self.servers[server_id] = server
+
+        return server
+
+    async def ensure(self, server_id: int) -> None:
+        """
+        Ensure that a server document exists, creating it if it doesn't.
+
+        :param server_id: The server's ID.
+        """
+        if server_id in self.known_ids:
+            return
+
+        if not await self.get(server_id):
+            server = Server(id=server_id)
+            await server.create()
+
+            self.known_ids.add(server_id)
+            self.servers[server_id] = server
+
+    async def update(self, server_id: int, *args: BaseUpdateOperator) -> None:
+        """
+        Update a server document.
+
+        :param server_id: The server's ID.
+        :param args: The update operators to apply.
+        """
+        await Server.find_one(Server.id == server_id).update(*args)
+        self.servers.pop(server_id, None)
+
+    async def delete_many(self, server_ids: set[int]) -> None:
+        """
+        Delete several server documents in one query.
+
+        :param server_ids: The servers' IDs.
+        """
+        await Server.find_many(In(Server.id, server_ids)).delete()
+
+        for server_id in server_ids:
+            self.known_ids.discard(server_id)
+            self.servers.pop(server_id, None)
+
+    def invalidate(self, server_id: int | None = None) -> None:
+        """
+        Drop a cached server document, or all of them, after it was changed without
+        going through the cache. The server is still known to exist.
+
+        :param server_id: The server's ID, or `None` to drop every server document.
+        """
+        if server_id is None:
+            self.servers.clear()
+        else:
+            self.servers.pop(server_id, None)
+
+
+class PreferenceCache:
+    """
+    Bounded LRU cache of user preferences, keyed by `(user_id, server_id)`, that
+    expire after `CACHE_TTL_SECONDS`, in case another cluster changed them.
+
+    Missing preferences are cached too, so that commands used by unregistered users
+    don't query the database every time. Anything that creates, changes or deletes
+    a preference without going through the cached document must invalidate it.
+    """
+
+    def __init__(self, maxsize: int = PREFERENCE_CACHE_SIZE) -> None:
+        self.preferences: TTLCache[tuple[int, int], Preference | None] = TTLCache(
+            maxsize=maxsize, ttl=CACHE_TTL_SECONDS
+        )
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, user_id: int, server_id: int) -> Preference | None:
+        """
+        Get a user's preference for a server, fetching it from the database if it
+        isn't cached.
+
+        :param user_id: The user's ID.
+        :param server_id: The server's ID.
+
+        :return: The preference, or `None` if it doesn't exist.
+        """
+        key = (user_id, server_id)
+
+        if key in self.preferences:
+            self.hits += 1
+            return self.preferences[key]
+
+        self.misses += 1
+        preference = await Preference.find_one(
+            Preference.user_id == user_id,
+            Preference.server_id == server_id,
+        )
+        self.preferences[key] = preference
+
+        return preference
+
+    def invalidate(self, user_id: int, server_id: int | None = None) -> None:
+        """
+        Drop a user's cached preference for a server, or all of the user's cached
+        preferences.
+
+        :param user_id: The user's ID.
+        :param server_id: The server's ID, or `None` for every server.
+        """
+        if server_id is not None:
+            self.preferences.pop((user_id, server_id), None)
+            return
+
+        self.invalidate_users({user_id})
+
+    def invalidate_users(self, user_ids: set[int]) -> None:
+        """
+        Drop all cached preferences of several users, in one pass over the cache.
+
+        :param user_ids: The users' IDs.
+        """
+        for key in [key for key in self.preferences if key[0] in user_ids]:
+            self.preferences.pop(key, None)
+
+    def invalidate_server(self, server_id: int) -> None:
+        """
+        Drop all cached preferences for a server.
+
+        :param server_id: The server's ID.
+        """
+        for key in [key for key in self.preferences if key[1] == server_id]:
+            self.preferences.pop(key, None)
+
+    @property
+    def hit_rate(self) -> float:
+        """
+        The fraction of lookups served from the cache.
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> str:
+        """
+        Summarise the cache's usage and reset its counters.
+
+        :return: The summary.
+        """
+        summary = (
+            f"Preference cache: {self.hit_rate:.1%} hit rate ({self.hits} hits, "
+            f"{self.misses} misses), {len(self.preferences)} / "
+            f"{self.preferences.maxsize} cached"
+        )
+        self.hits = 0
+        self.misses = 0
+
+        return summary
+
+
+server_cache = ServerCache()
+preference_cache = PreferenceCache()
@@ -0,0 +1,184 @@
+import asyncio
+import logging
+import os
+import sys
+from datetime import UTC, datetime
+from typing import Any
+
+from beanie import Document
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+from .models import Preference, Record, RecordBucket, StatsUpdate, User, Winners
+
+# Compound indexes of each collection, on top of the `Indexed` fields declared in
+# the models. User lookups are all by `_id`, so users only need the default index.
+INDEXES: dict[type[Document], list[IndexModel]] = {
+    Preference: [
+        IndexModel(
+            [("server_id", ASCENDING), ("user_id", ASCENDING)],
+            name="server_id_user_id",
+            unique=True,
+        ),
+    ],
+    Record: [
+        IndexModel(
+            [("user_id", ASCENDING), ("timestamp", ASCENDING)],
+            name="user_id_timestamp",
+        ),
+        IndexModel([("timestamp", ASCENDING)], name="timestamp"),
+    ],
+    RecordBucket: [
+        IndexModel(
+            [("user_id", ASCENDING), ("month", ASCENDING)],
+            name="user_id_month",
+            unique=True,
+        ),
+        IndexModel([("month", ASCENDING)], name="month"),
+    ],
+    StatsUpdate: [
+        # Only the latest update is followed, so old ones are expired after a week.
+        IndexModel(
+            [("started_at", DESCENDING)],
+            name="started_at",
+            expireAfterSeconds=7 * 24 * 60 * 60,
+        ),
+    ],
+    User: [],
+    Winners: [
+        IndexModel(
+            [
+                ("server_id", ASCENDING),
+                ("period", ASCENDING),
+                ("timestamp", ASCENDING),
+            ],
+            name="server_id_period_timestamp",
+            unique=True,
+        ),
+    ],
+}
+
+# Error code of a unique index violation.
+DUPLICATE_KEY_ERROR_CODE = 11000
+
+logger = logging.getLogger("discord_bot")
+
+# Indexes made redundant by the compound indexes above.
+REDUNDANT_INDEXES: dict[type[Document], list[str]] = {
+    # Prefix of `server_id_user_id`.
+    Preference: ["server_id_1"],
+}
+
+# Hot queries that must be served by an index, as `(model, filter)` pairs.
+HOT_QUERIES: list[tuple[type[Document], dict[str, Any]]] = [
+    (Preference, {"user_id": 0, "server_id": 0}),
+    (Preference, {"server_id": 0}),
+    (Preference, {"user_id": 0}),
+    (Record, {"user_id": 0, "timestamp": {"$gte": datetime(2024, 1, 1, tzinfo=UTC)}}),
+    (Record, {"timestamp": {"$gte": datetime(2024, 1, 1, tzinfo=UTC)}}),
+    (RecordBucket, {"user_id": 0, "month": datetime(2024, 1, 1)}),
+    (RecordBucket, {"month": {"$gte": datetime(2024, 1, 1)}}),
+    (User, {"_id": 0}),
+    (Winners, {"server_id": 0, "period": "day", "timestamp": datetime(2024, 1, 1)}),
+]
+
+
+async def apply_indexes() -> None:
+    """
+    Create the declared indexes and drop the ones they made redundant.
+
+    Creating an index that already exists is a no-op, so this is run on every
+    startup. A unique index can't be created over duplicate documents, which are
+    left for `python -m database.migrations` to delete deliberately, so the failure
+    is logged instead of stopping the bot.
+    """
+    for model, indexes in INDEXES.items():
+        if not indexes:
+            continue
+
+        try:
+            await model.get_motor_collection().create_indexes(indexes)
+        except OperationFailure as e:
+            if e.code != DUPLICATE_KEY_ERROR_CODE:
+                raise
+
+            logger.warning(
+                f"Indexes of {model.get_collection_name()} not created, since the "
+                f"collection has duplicates (run `python -m database.migrations`): {e}"
+            )
+
+    for model, index_names in REDUNDANT_INDEXES.items():
+        collection = model.get_motor_collection()
+        existing_index_names = await collection.index_information()
+
+        for index_name in index_names:
+            if index_name in existing_index_names:
+                await collection.drop_index(index_name)
+
+
+def _winning_plan_stages(explain_output: Any, in_winning_plan: bool = False) -> set:
+    """
+    Collect the stages of the winning plans in an explain output.
+
+    :param explain_output: The (nested) explain output.
+    :param in_winning_plan: Whether `explain_output` is part of a winning plan.
+
+    :return: The names of the stages.
+    """
+    stages = set()
+
+    if isinstance(explain_output, dict):
+        for key, value in explain_output.items():
+            if in_winning_plan and key == "stage":
+                stages.add(value)
+
+            stages |= _winning_plan_stages(
+                value, in_winning_plan or key == "winningPlan"
+            )
+
+    elif isinstance(explain_output, list):
+        for value in explain_output:
+            stages |= _winning_plan_stages(value, in_winning_plan)
+
+    return stages
+
+
+async def check_query_plans() -> bool:
+    """
+    Explain each hot query and report the ones that fall back to a collection scan.
+
+    :return: Whether every hot query is served by an index.
+    """
+    all_indexed = True
+
+    for model, query_filter in HOT_QUERIES:
+        collection = model.get_motor_collection()
+        explain_output = await collection.database.command(
+            "explain",
+            {"find": collection.name, "filter": query_filter},
+            verbosity="queryPlanner",
+        )
+
+        stages = _winning_plan_stages(explain_output)
+        indexed = "COLLSCAN" not in stages
+        all_indexed &= indexed
+
+        print(
+            f"{'OK      ' if indexed else 'COLLSCAN'} {collection.name} "
+            f"{query_filter} ({', '.join(sorted(stages))})"
+        )
+
+    return all_indexed
+
+
+if __name__ == "__main__":
+    from dotenv import find_dotenv, load_dotenv
+
+    from .setup import initialise_mongodb_conn
+
+    async def main() -> bool:
+        await initialise_mongodb_conn(os.getenv("MONGODB_URI"))
+        return await check_query_plans()
+
+    load_dotenv(find_dotenv())
+    sys.exit(0 if asyncio.run(main()) else 1)
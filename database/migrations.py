@@ -0,0 +1,186 @@
+import asyncio
+import os
+
+from beanie.operators import In
+from pymongo import ReplaceOne
+
+from .indexes import apply_indexes
+from .models import Preference, Record, RecordBucket
+from .models.record_bucket import (
+    day_key,
+    delta_encode,
+    languages_to_counts,
+    month_start,
+    skills_to_counts,
+    submissions_to_counts,
+)
+
+# Number of buckets written, or records deleted, per query.
+MIGRATION_BATCH_SIZE = 500
+
+
+async def deduplicate_preferences() -> list:
+    """
+    Delete duplicate preferences of a user in the same server, keeping the oldest,
+    so that the unique `server_id_user_id` index can be created.
+
+    :return: The IDs of the deleted preferences.
+    """
+    duplicate_ids = []
+
+    async for duplicate in Preference.aggregate(
+        [
+            {"$sort": {"_id": 1}},
+            {
+                "$group": {
+                    "_id": {"server_id": "$server_id", "user_id": "$user_id"},
+                    "ids": {"$push": "$_id"},
+                    "count": {"$sum": 1},
+                }
+            },
+            {"$match": {"count": {"$gt": 1}}},
+        ]
+    ):
+        duplicate_ids.extend(duplicate["ids"][1:])
+
+    for i in range(0, len(duplicate_ids), MIGRATION_BATCH_SIZE):
+        await Preference.find(
+            In(Preference.id, duplicate_ids[i : i + MIGRATION_BATCH_SIZE])
+        ).delete()
+
+    return duplicate_ids
+
+
+async def deduplicate_records() -> int:
+    """
+    Delete duplicate records of a user on the same day, keeping the earliest one,
+    which is the one `save_daily_record` keeps too.
+
+    :return: The number of records deleted.
+    """
+    duplicate_ids = []
+
+    async for duplicate in Record.aggregate(
+        [
+            {"$sort": {"timestamp": 1, "_id": 1}},
+            {
+                "$group": {
+                    "_id": {
+                        "user_id": "$user_id",
+                        "day": {"$dateTrunc": {"date": "$timestamp", "unit": "day"}},
+                    },
+                    "ids": {"$push": "$_id"},
+                }
+            },
+            {"$match": {"ids.1": {"$exists": True}}},
+        ],
+        allowDiskUse=True,
+    ):
+        duplicate_ids.extend(duplicate["ids"][1:])
+
+    for i in range(0, len(duplicate_ids), MIGRATION_BATCH_SIZE):
+        await Record.find(
+            In(Record.id, duplicate_ids[i : i + MIGRATION_BATCH_SIZE])
+        ).delete()
+
+    return len(duplicate_ids)
+
+
+def _replace_bucket(bucket: RecordBucket) -> ReplaceOne:
+    """
+    Build the write that stores a bucket, replacing any bucket of the same user and
+    month.
+
+    :param bucket: The bucket.
+
+    :return: The write.
+    """
+    return ReplaceOne(
+        {"user_id": bucket.user_id, "month": bucket.month},
+        bucket.model_dump(exclude={"id", "revision_id"}),
+        upsert=True,
+    )
+
+
+async def migrate_records_to_buckets() -> int:
+    """
+    Rebuild the record buckets from the time series records.
+
+    Buckets are replaced as a whole, so the migration can be run again, e.g. after
+    being interrupted.
+
+    :return: The number of buckets written.
+    """
+    collection = RecordBucket.get_motor_collection()
+    writes: list[ReplaceOne] = []
+    written = 0
+
+    bucket: RecordBucket | None = None
+    languages: dict[str, int] = {}
+    skills: dict[str, int] = {}
+
+    async for record in Record.find_all().sort(
+        +Record.user_id, +Record.timestamp, +Record.id
+    ):
+        month = month_start(record.timestamp)
+        key = day_key(record.timestamp)
+        record_languages = languages_to_counts(record.languages_problem_count or [])
+        record_skills = skills_to_counts(record.skills_problem_count)
+
+        if not bucket or bucket.user_id != record.user_id or bucket.month != month:
+            if bucket:
+                writes.append(_replace_bucket(bucket))
+
+            bucket = RecordBucket(
+                user_id=record.user_id,
+                month=month,
+                languages=record_languages,
+                skills=record_skills,
+            )
+
+        elif key in bucket.submissions:
+            # Only the first record of a day is kept.
+            continue
+
+        else:
+            bucket.languages_deltas[key] = delta_encode(languages, record_languages)
+            bucket.skills_deltas[key] = delta_encode(skills, record_skills)
+
+        bucket.submissions[key] = submissions_to_counts(record.submissions)
+        languages, skills = record_languages, record_skills
+
+        if len(writes) >= MIGRATION_BATCH_SIZE:
+            await collection.bulk_write(writes, ordered=False)
+            written += len(writes)
+            writes = []
+
+    if bucket:
+        writes.append(_replace_bucket(bucket))
+
+    if writes:
+        await collection.bulk_write(writes, ordered=False)
+        written += len(writes)
+
+    return written
+
+
+if __name__ == "__main__":
+    from dotenv import find_dotenv, load_dotenv
+
+    from .setup import initialise_mongodb_conn
+
+    async def main() -> None:
+        await initialise_mongodb_conn(os.getenv("MONGODB_URI"))
+
+        preference_ids = await deduplicate_preferences()
+        print(f"Deleted {len(preference_ids)} duplicate preferences")
+        for preference_id in preference_ids:
+            print(f"- {preference_id}")
+        # Creates the unique indexes that the duplicates prevented.
+        await apply_indexes()
+
+        print(f"Deleted {await deduplicate_records()} duplicate records")
+        print(f"Wrote {await migrate_records_to_buckets()} record buckets")
+
+    load_dotenv(find_dotenv())
+    asyncio.run(main())
@@ -1,6 +1,13 @@
+from .broadcast import Broadcast
+from .channel_failure import ChannelFailure
+from .checkpoint import Checkpoint
+from .cluster_stats import ClusterStats
+from .command_tree import CommandTree
 from .preference import Preference
 from .record import Record
+from .record_bucket import BucketScoresView, RecordBucket
 from .server import Channels, Server
+from .stats_update import StatsUpdate
 from .user import (
     LanguageProblemCount,
     SkillProblemCount,
@@ -10,3 +17,4 @@ from .user import (
     User,
     Votes,
 )
+from .winners import Winner, Winners
@@ -0,0 +1,27 @@
+from datetime import UTC, datetime
+from typing import Dict, Optional
+
+from beanie import Document
+from pydantic import Field
+
+from constants import DeliveryState
+
+
+class Broadcast(Document):
+    """
+    An announcement being sent to every server's maintenance channels, with the
+    delivery state of each channel, so that it can resume after a restart.
+    """
+
+    content: str
+    image_url: Optional[str] = None
+    # Delivery state by channel ID (as a string, since it's a document key).
+    deliveries: Optional[Dict[str, DeliveryState]] = Field(default_factory=dict)
+    # Server ID by channel ID, so that each cluster only sends to its own servers.
+    channel_servers: Optional[Dict[str, int]] = Field(default_factory=dict)
+
+    created_at: Optional[datetime] = Field(default_factory=lambda: datetime.now(UTC))
+    completed_at: Optional[datetime] = None
+
+    class Settings:
+        name = "broadcasts"
@@ -0,0 +1,24 @@
+from datetime import UTC, datetime
+from typing import Optional
+
+from beanie import Document
+from pydantic import Field
+
+
+class ChannelFailure(Document):
+    """
+    Consecutive failed deliveries to a notification channel. Deleted as soon as a
+    delivery to the channel succeeds.
+    """
+
+    # The channel's ID.
+    id: int
+    # Number of days with failed deliveries, counted once a day.
+    failures: int = 0
+
+    last_failed_at: Optional[datetime] = Field(
+        default_factory=lambda: datetime.now(UTC)
+    )
+
+    class Settings:
+        name = "channel_failures"
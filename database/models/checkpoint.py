@@ -0,0 +1,24 @@
+from datetime import UTC, datetime
+from typing import Optional
+
+from beanie import Document
+from pydantic import Field
+
+
+class Checkpoint(Document):
+    """
+    Progress of a resumable background job, so that it picks up where it left off
+    after a restart.
+    """
+
+    # Name of the job.
+    id: str
+    # Last item processed in the current pass, or `None` at the start of a pass.
+    cursor: Optional[int] = None
+    # When the last full pass completed.
+    completed_at: Optional[datetime] = None
+
+    updated_at: Optional[datetime] = Field(default_factory=lambda: datetime.now(UTC))
+
+    class Settings:
+        name = "checkpoints"
@@ -0,0 +1,22 @@
+from datetime import UTC, datetime
+from typing import Optional
+
+from beanie import Document
+from pydantic import Field
+
+
+class ClusterStats(Document):
+    """
+    The number of guilds and members of a cluster, so that the totals of every
+    cluster can be reported.
+    """
+
+    # The cluster's ID.
+    id: int
+    guilds: int = 0
+    members: int = 0
+
+    updated_at: Optional[datetime] = Field(default_factory=lambda: datetime.now(UTC))
+
+    class Settings:
+        name = "cluster_stats"
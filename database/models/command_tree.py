@@ -0,0 +1,25 @@
+from datetime import UTC, datetime
+from typing import Any, Dict, Optional
+
+from beanie import Document
+from pydantic import Field
+
+
+class CommandTree(Document):
+    """
+    The app commands last synced to Discord, so that they're only synced again when
+    they change.
+    """
+
+    # `global`, or the ID of the guild that the commands were synced to.
+    id: str
+    # Hash of `signatures`.
+    digest: str
+    # Payload of each command, as sent to Discord, by `type:name` (see
+    # `utils.command_sync.get_signatures`).
+    signatures: Optional[Dict[str, Any]] = Field(default_factory=dict)
+
+    synced_at: Optional[datetime] = Field(default_factory=lambda: datetime.now(UTC))
+
+    class Settings:
+        name = "command_trees"
@@ -7,7 +7,8 @@ from pydantic import Field
 
 class Preference(Document):
     user_id: Indexed(int)  # type: ignore
-    server_id: Indexed(int)  # type: ignore
+    # Indexed together with user_id in database/indexes.py.
+    server_id: int
 
     name: str
     url: Optional[bool] = True
@@ -0,0 +1,168 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from beanie import Document
+from pydantic import BaseModel, Field
+
+from .user import LanguageProblemCount, SkillsProblemCount, Submissions
+
+
+def day_key(timestamp: datetime) -> str:
+    """
+    Get the key of a day within its month's bucket.
+
+    :param timestamp: A timestamp on the day.
+
+    :return: The zero-padded day of the month, so that keys sort chronologically.
+    """
+    return f"{timestamp.day:02d}"
+
+
+def month_start(timestamp: datetime) -> datetime:
+    """
+    Get the start of the month that a timestamp is in, which identifies its bucket.
+
+    :param timestamp: The timestamp.
+
+    :return: Midnight of the first day of the month.
+    """
+    return timestamp.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def delta_encode(before: dict[str, int], after: dict[str, int]) -> dict[str, int]:
+    """
+    Get the problem counts that changed between two states.
+
+    :param before: The problem counts before.
+    :param after: The problem counts after.
+
+    :return: The changed counts, as their difference.
+    """
+    return {
+        key: count - before.get(key, 0)
+        for key, count in after.items()
+        if count != before.get(key, 0)
+    }
+
+
+def delta_decode(base: dict[str, int], deltas: list[dict[str, int]]) -> dict[str, int]:
+    """
+    Apply deltas to problem counts.
+
+    :param base: The problem counts to start from.
+    :param deltas: The deltas to apply, in chronological order.
+
+    :return: The resulting problem counts.
+    """
+    counts = dict(base)
+    for delta in deltas:
+        for key, difference in delta.items():
+            counts[key] = counts.get(key, 0) + difference
+
+    return counts
+
+
+def languages_to_counts(
+    languages_problem_count: list[LanguageProblemCount],
+) -> dict[str, int]:
+    """
+    Flatten language problem counts into a mapping of language to count.
+
+    :param languages_problem_count: The language problem counts.
+
+    :return: The problem count of each language.
+    """
+    return {language.language: language.count for language in languages_problem_count}
+
+
+def skills_to_counts(skills_problem_count: SkillsProblemCount) -> dict[str, int]:
+    """
+    Flatten skill problem counts into a mapping of `level/skill` to count.
+
+    :param skills_problem_count: The skill problem counts.
+
+    :return: The problem count of each skill.
+    """
+    return {
+        f"{level}/{skill.skill}": skill.count
+        for level, skills in (
+            ("fundamental", skills_problem_count.fundamental),
+            ("intermediate", skills_problem_count.intermediate),
+            ("advanced", skills_problem_count.advanced),
+        )
+        for skill in skills
+    }
+
+
+def submissions_to_counts(submissions: Submissions) -> list[int]:
+    """
+    Convert submissions to the compact array stored in record buckets.
+
+    :param submissions: The submissions.
+
+    :return: The `[easy, medium, hard, score]` counts.
+    """
+    return [
+        submissions.easy,
+        submissions.medium,
+        submissions.hard,
+        submissions.score,
+    ]
+
+
+class RecordBucket(Document):
+    """
+    A user's daily records for one month.
+
+    Submission counts are stored per day as `[easy, medium, hard, score]`. The
+    language and skill problem counts are stored in full once, as of the bucket's
+    first record, and as the counts that changed on each day after that.
+    """
+
+    user_id: int
+    month: datetime
+
+    # Submission counts by day of the month (see `day_key`).
+    submissions: Optional[Dict[str, List[int]]] = Field(default_factory=dict)
+    # Problem counts as of the first record in the bucket.
+    languages: Optional[Dict[str, int]] = Field(default_factory=dict)
+    skills: Optional[Dict[str, int]] = Field(default_factory=dict)
+    # Changes in the problem counts by day of the month.
+    languages_deltas: Optional[Dict[str, Dict[str, int]]] = Field(default_factory=dict)
+    skills_deltas: Optional[Dict[str, Dict[str, int]]] = Field(default_factory=dict)
+
+    def counts_before(self, key: str) -> tuple[dict[str, int], dict[str, int]]:
+        """
+        Reconstruct the language and skill problem counts before a day.
+
+        :param key: The day's key.
+
+        :return: The language and skill problem counts.
+        """
+        return (
+            delta_decode(
+                self.languages,
+                [
+                    delta
+                    for day, delta in sorted(self.languages_deltas.items())
+                    if day < key
+                ],
+            ),
+            delta_decode(
+                self.skills,
+                [
+                    delta
+                    for day, delta in sorted(self.skills_deltas.items())
+                    if day < key
+                ],
+            ),
+        )
+
+    class Settings:
+        name = "record_buckets"
+
+
+class BucketScoresView(BaseModel):
+    user_id: int
+    month: datetime
+    submissions: Dict[str, List[int]]
@@ -0,0 +1,24 @@
+from datetime import UTC, datetime
+from typing import List, Optional
+
+from beanie import Document
+from pydantic import Field
+
+from constants import Period
+
+
+class StatsUpdate(Document):
+    """
+    A run of the stats update, which only the primary cluster performs, so that the
+    other clusters can follow it for their own guilds.
+    """
+
+    started_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
+    completed_at: Optional[datetime] = None
+    # Periods whose leaderboards were reset by the update.
+    resets: Optional[List[Period]] = Field(default_factory=list)
+    # Users whose streak or milestone tier changed during the update.
+    tier_changed_user_ids: Optional[List[int]] = Field(default_factory=list)
+
+    class Settings:
+        name = "stats_updates"
@@ -20,6 +20,10 @@ class Submissions(BaseModel):
 class Stats(BaseModel):
     submissions: Optional[Submissions] = Field(default_factory=Submissions)
     streak: Optional[int] = 0
+    # Problems solved as of the last daily reset, and the day of that reset, from
+    # which the streak is maintained.
+    streak_solved: Optional[int] = None
+    streak_day: Optional[datetime] = None
 
 
 class LanguageProblemCount(BaseModel):
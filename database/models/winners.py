@@ -0,0 +1,28 @@
+from datetime import UTC, datetime
+from typing import List, Optional
+
+from beanie import Document
+from pydantic import BaseModel, Field
+
+from constants import Period
+
+
+class Winner(BaseModel):
+    user_id: int
+    name: str
+    profile_url: Optional[str] = None
+    score: int
+    place: int
+
+
+class Winners(Document):
+    server_id: int
+    period: Period
+    # Start of the period that the winners were computed for.
+    timestamp: datetime
+    winners: Optional[List[Winner]] = Field(default_factory=list)
+
+    created_at: Optional[datetime] = Field(default_factory=lambda: datetime.now(UTC))
+
+    class Settings:
+        name = "winners"
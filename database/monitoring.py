@@ -0,0 +1,161 @@
+import threading
+from collections import defaultdict, deque
+from statistics import quantiles
+
+from pymongo import monitoring
+
+# Number of most recent samples kept per metric.
+MAX_SAMPLES = 10_000
+
+
+def summarise(samples: deque[float]) -> str:
+    """
+    Summarise latency samples as their count and percentiles.
+
+    :param samples: The latencies in milliseconds.
+
+    :return: The summary.
+    """
+    if len(samples) < 2:
+        return f"n={len(samples)}"
+
+    percentiles = quantiles(samples, n=100, method="inclusive")
+
+    return (
+        f"n={len(samples)} p50={percentiles[49]:.1f}ms "
+        f"p95={percentiles[94]:.1f}ms max={max(samples):.1f}ms"
+    )
+
+
+class CommandLatencyListener(monitoring.CommandListener):
+    """
+    Records the latency of every MongoDB command, grouped by command name, so that
+    the bulk writes of the refresh (`insert`, `update`) can be told apart from the
+    interactive reads (`find`, `aggregate`).
+
+    Events are published from Motor's worker threads, so the samples are only
+    accessed while holding `lock`.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.latencies: defaultdict[str, deque[float]] = self._new_latencies()
+        self.failures: defaultdict[str, int] = defaultdict(int)
+
+    @staticmethod
+    def _new_latencies() -> defaultdict[str, deque[float]]:
+        return defaultdict(lambda: deque(maxlen=MAX_SAMPLES))
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        pass
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        with self.lock:
+            self.latencies[event.command_name].append(event.duration_micros / 1000)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        with self.lock:
+            self.latencies[event.command_name].append(event.duration_micros / 1000)
+            self.failures[event.command_name] += 1
+
+    def report(self) -> list[str]:
+        """
+        Summarise the latencies since the last report.
+
+        :return: One line per command name.
+        """
+        with self.lock:
+            latencies, self.latencies = self.latencies, self._new_latencies()
+            failures, self.failures = self.failures, defaultdict(int)
+
+        return [
+            f"{command_name}: {summarise(samples)}"
+            + (f" failed={failures[command_name]}" if failures[command_name] else "")
+            for command_name, samples in sorted(latencies.items())
+        ]
+
+
+class PoolListener(monitoring.ConnectionPoolListener):
+    """
+    Records how long commands wait to check out a connection and how many
+    connections are in use, to size the connection pool.
+
+    Events are published from Motor's worker threads, so the counters are only
+    accessed while holding `lock`.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.checkout_waits: deque[float] = deque(maxlen=MAX_SAMPLES)
+        self.checkout_failures = 0
+        self.checked_out = 0
+        self.max_checked_out = 0
+
+    def pool_created(self, event: monitoring.PoolCreatedEvent) -> None:
+        pass
+
+    def pool_ready(self, event: monitoring.PoolReadyEvent) -> None:
+        pass
+
+    def pool_cleared(self, event: monitoring.PoolClearedEvent) -> None:
+        pass
+
+    def pool_closed(self, event: monitoring.PoolClosedEvent) -> None:
+        pass
+
+    def connection_created(self, event: monitoring.ConnectionCreatedEvent) -> None:
+        pass
+
+    def connection_ready(self, event: monitoring.ConnectionReadyEvent) -> None:
+        pass
+
+    def connection_closed(self, event: monitoring.ConnectionClosedEvent) -> None:
+        pass
+
+    def connection_check_out_started(
+        self, event: monitoring.ConnectionCheckOutStartedEvent
+    ) -> None:
+        pass
+
+    def connection_check_out_failed(
+        self, event: monitoring.ConnectionCheckOutFailedEvent
+    ) -> None:
+        with self.lock:
+            self.checkout_failures += 1
+
+    def connection_checked_out(
+        self, event: monitoring.ConnectionCheckedOutEvent
+    ) -> None:
+        with self.lock:
+            if event.duration is not None:
+                self.checkout_waits.append(event.duration * 1000)
+            self.checked_out += 1
+            self.max_checked_out = max(self.max_checked_out, self.checked_out)
+
+    def connection_checked_in(self, event: monitoring.ConnectionCheckedInEvent) -> None:
+        with self.lock:
+            self.checked_out -= 1
+
+    def report(self) -> list[str]:
+        """
+        Summarise the pool usage since the last report.
+
+        :return: The summary lines.
+        """
+        with self.lock:
+            checkout_waits = self.checkout_waits
+            checkout_failures = self.checkout_failures
+            max_checked_out = self.max_checked_out
+
+            self.checkout_waits = deque(maxlen=MAX_SAMPLES)
+            self.checkout_failures = 0
+            self.max_checked_out = self.checked_out
+
+        lines = [
+            f"checkout wait: {summarise(checkout_waits)}",
+            f"max connections in use: {max_checked_out}",
+        ]
+        if checkout_failures:
+            lines.append(f"checkout failures: {checkout_failures}")
+
+        return lines
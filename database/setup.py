@@ -1,31 +1,66 @@
 import os
+from typing import Any
 
 from beanie import init_beanie
 from motor.motor_asyncio import AsyncIOMotorClient
 
-from .models import Preference, Record, Server, User
+from .indexes import apply_indexes
+from .models import (
+    Broadcast,
+    ChannelFailure,
+    Checkpoint,
+    ClusterStats,
+    CommandTree,
+    Preference,
+    Record,
+    RecordBucket,
+    Server,
+    StatsUpdate,
+    User,
+    Winners,
+)
 
 
 async def initialise_mongodb_conn(
-    mongodb_uri: str, global_leaderboard_id: int = 0
-) -> None:
+    mongodb_uri: str, global_leaderboard_id: int = 0, **client_options: Any
+) -> AsyncIOMotorClient:
     """
     Initialise the MongoDB connection and create the necessary collections
 
     :param mongodb_uri: The MongoDB URI
+    :param client_options: Options passed to the MongoDB client, such as the pool
+    size, timeouts, read preference, compressors and event listeners.
+
+    :return: The MongoDB client, to be closed on shutdown.
     """
-    mongodb_client = AsyncIOMotorClient(mongodb_uri)
+    mongodb_client = AsyncIOMotorClient(mongodb_uri, **client_options)
 
     await init_beanie(
         database=mongodb_client.bot,
-        document_models=[Preference, Record, Server, User],
+        document_models=[
+            Broadcast,
+            ChannelFailure,
+            Checkpoint,
+            ClusterStats,
+            CommandTree,
+            Preference,
+            Record,
+            RecordBucket,
+            Server,
+            StatsUpdate,
+            User,
+            Winners,
+        ],
     )
+    await apply_indexes()
 
     server = await Server.get(global_leaderboard_id)
     if not server:
         server = Server(id=global_leaderboard_id)
         await server.create()
 
+    return mongodb_client
+
 
 if __name__ == "__main__":
     import asyncio
@@ -0,0 +1,175 @@
+"""
+Runs the bot as several clusters, each a `main.py` process running a range of the
+shards, and restarts the clusters that exit.
+
+Environment variables, on top of the bot's:
+- `CLUSTER_COUNT`: The number of clusters (default: 1).
+- `SHARD_COUNT`: The total number of shards (default: as many as Discord
+  recommends).
+
+Cluster 0 runs the scheduled jobs that must run exactly once, like the stats update,
+and the shard that receives direct messages.
+"""
+
+import asyncio
+import logging
+import os
+import signal
+import sys
+
+import aiohttp
+from dotenv import find_dotenv, load_dotenv
+
+# Discord allows one shard to identify every 5 seconds (per `max_concurrency`).
+IDENTIFY_INTERVAL_SECONDS = 5
+
+# Time to wait before restarting a cluster that exited.
+RESTART_DELAY_SECONDS = 10
+
+logger = logging.getLogger("launcher")
+
+
+async def get_recommended_shard_count(token: str) -> int:
+    """
+    Get the number of shards that Discord recommends for the bot.
+
+    :param token: The bot's token.
+
+    :return: The number of shards.
+    """
+    async with aiohttp.ClientSession() as session:
+        async with session.get(
+            "https://discord.com/api/v10/gateway/bot",
+            headers={"Authorization": f"Bot {token}"},
+        ) as response:
+            response.raise_for_status()
+            return (await response.json())["shards"]
+
+
+def split_shards(shard_count: int, cluster_count: int) -> list[list[int]]:
+    """
+    Split the shards into contiguous ranges of (almost) the same size.
+
+    :param shard_count: The total number of shards.
+    :param cluster_count: The number of clusters.
+
+    :return: The shard IDs of each cluster, where cluster 0 runs shard 0.
+    """
+    size, remainder = divmod(shard_count, cluster_count)
+    clusters = []
+
+    start = 0
+    for cluster_id in range(cluster_count):
+        end = start + size + (1 if cluster_id < remainder else 0)
+        clusters.append(list(range(start, end)))
+        start = end
+
+    return clusters
+
+
+async def run_cluster(
+    cluster_id: int,
+    shard_ids: list[int],
+    shard_count: int,
+    start_delay: float,
+    stopping: asyncio.Event,
+    processes: dict[int, asyncio.subprocess.Process],
+) -> None:
+    """
+    Run a cluster, restarting it whenever it exits, until the launcher stops.
+
+    :param cluster_id: The cluster's ID.
+    :param shard_ids: The shards that the cluster runs.
+    :param shard_count: The total number of shards.
+    :param start_delay: Time to wait before the first start, so that the clusters
+    don't identify at the same time.
+    :param stopping: Set when the launcher is stopping.
+    :param processes: The running process of each cluster, by cluster ID.
+    """
+    env = {
+        **os.environ,
+        "SHARD_COUNT": str(shard_count),
+        "SHARD_IDS": ",".join(str(shard_id) for shard_id in shard_ids),
+        "CLUSTER_ID": str(cluster_id),
+    }
+    main_path = os.path.join(os.path.dirname(os.path.realpath(__file__)), "main.py")
+
+    await asyncio.sleep(start_delay)
+
+    while not stopping.is_set():
+        logger.info(
+            f"Starting cluster {cluster_id} with shards "
+            f"{shard_ids[0]}-{shard_ids[-1]} of {shard_count}"
+        )
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, main_path, env=env
+        )
+        processes[cluster_id] = process
+
+        return_code = await process.wait()
+        del processes[cluster_id]
+
+        if stopping.is_set():
+            break
+
+        logger.warning(
+            f"Cluster {cluster_id} exited with code {return_code}, restarting in "
+            f"{RESTART_DELAY_SECONDS} seconds"
+        )
+        await asyncio.sleep(RESTART_DELAY_SECONDS)
+
+    logger.info(f"Cluster {cluster_id} stopped")
+
+
+async def main() -> None:
+    cluster_count = int(os.getenv("CLUSTER_COUNT", "1"))
+    shard_count = int(os.getenv("SHARD_COUNT", "0")) or (
+        await get_recommended_shard_count(os.getenv("DISCORD_TOKEN"))
+    )
+    # A cluster without shards would have nothing to do.
+    cluster_count = min(cluster_count, shard_count)
+
+    stopping = asyncio.Event()
+    processes: dict[int, asyncio.subprocess.Process] = {}
+
+    def stop() -> None:
+        logger.info("Stopping the clusters")
+        stopping.set()
+        # Interrupted like from the console, so that the bot closes gracefully.
+        for process in processes.values():
+            process.send_signal(signal.SIGINT)
+
+    loop = asyncio.get_running_loop()
+    for signal_number in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signal_number, stop)
+
+    start_delay = 0
+    cluster_tasks = []
+
+    for cluster_id, shard_ids in enumerate(split_shards(shard_count, cluster_count)):
+        cluster_tasks.append(
+            asyncio.create_task(
+                run_cluster(
+                    cluster_id,
+                    shard_ids,
+                    shard_count,
+                    start_delay,
+                    stopping,
+                    processes,
+                )
+            )
+        )
+        start_delay += len(shard_ids) * IDENTIFY_INTERVAL_SECONDS
+
+    await asyncio.gather(*cluster_tasks)
+
+
+if __name__ == "__main__":
+    load_dotenv(find_dotenv())
+    logging.basicConfig(
+        format="[{asctime}] [{levelname:<8}] {name}: {message}",
+        datefmt="%d-%m-%Y %H:%M:%S",
+        style="{",
+        level=logging.INFO,
+    )
+    asyncio.run(main())
@@ -19,6 +19,7 @@ governing permissions and limitations under the License.
 
 import logging
 import os
+import sys
 from datetime import UTC, datetime
 
 import discord
@@ -39,6 +40,26 @@ if __name__ == "__main__":
         int(os.getenv("LOGGING_CHANNEL_ID")),
         int(os.getenv("DEVELOPER_DISCORD_ID")),
         os.getenv("PRODUCTION", "False") == "True",
+        MONGODB_MAX_POOL_SIZE=int(os.getenv("MONGODB_MAX_POOL_SIZE", "100")),
+        MONGODB_MIN_POOL_SIZE=int(os.getenv("MONGODB_MIN_POOL_SIZE", "0")),
+        MONGODB_MAX_IDLE_TIME_MS=int(os.getenv("MONGODB_MAX_IDLE_TIME_MS", "0"))
+        or None,
+        MONGODB_TIMEOUT_MS=int(os.getenv("MONGODB_TIMEOUT_MS", "0")) or None,
+        MONGODB_READ_PREFERENCE=os.getenv("MONGODB_READ_PREFERENCE", "primary"),
+        MONGODB_COMPRESSORS=os.getenv("MONGODB_COMPRESSORS", "zstd,zlib"),
+        RECORD_BUCKETS=os.getenv("RECORD_BUCKETS", "False") == "True",
+        MEMBER_CACHE=os.getenv("MEMBER_CACHE", "full"),
+        RECORD_DAILY_RETENTION_DAYS=int(os.getenv("RECORD_DAILY_RETENTION_DAYS", "62")),
+        RECORD_WEEKLY_RETENTION_DAYS=int(
+            os.getenv("RECORD_WEEKLY_RETENTION_DAYS", "365")
+        ),
+        SHARD_COUNT=int(os.getenv("SHARD_COUNT", "0")) or None,
+        SHARD_IDS=(
+            [int(shard_id) for shard_id in os.getenv("SHARD_IDS").split(",")]
+            if os.getenv("SHARD_IDS")
+            else None
+        ),
+        CLUSTER_ID=int(os.getenv("CLUSTER_ID", "0")),
     )
 
     logs_path = os.path.join(os.path.dirname(__file__), "logs")
@@ -75,3 +96,9 @@ if __name__ == "__main__":
 
     bot = DiscordBot(intents, config, logger)
     bot.run(config.DISCORD_TOKEN)
+
+    if bot.restarting:
+        # Replaces this process, keeping its ID, so that a supervisor (like the
+        # launcher) doesn't see it exit.
+        logging.shutdown()
+        os.execv(sys.executable, [sys.executable, *sys.argv])
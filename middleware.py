@@ -3,7 +3,7 @@ from typing import Callable
 
 import discord
 
-from database.models import Server
+from database.cache import server_cache
 from ui.embeds.common import error_embed
 from utils.preferences import update_user_preferences_prompt
 
@@ -25,12 +25,7 @@ def ensure_server_document(func: Callable) -> Callable:
     async def wrapper(
         self, interaction: discord.Interaction, *args, **kwargs
     ) -> Callable | None:
-        server_id = interaction.guild.id
-        server = await Server.get(server_id)
-
-        if not server:
-            server = Server(id=server_id)
-            await server.create()
+        await server_cache.ensure(interaction.guild.id)
 
         return await func(self, interaction, *args, **kwargs)
 
@@ -101,11 +96,13 @@ def defer_interaction(
                 await interaction.followup.send(embed=embed)
                 return
 
-            # Execute the wrapped function
-            ret = await func(self, interaction, *args, **kwargs)
+            # Counted so that a restart waits for the interaction to be answered
+            async with interaction.client.in_flight_interactions.track():
+                # Execute the wrapped function
+                ret = await func(self, interaction, *args, **kwargs)
 
-            if user_preferences_prompt:
-                await update_user_preferences_prompt(interaction, reminder=True)
+                if user_preferences_prompt:
+                    await update_user_preferences_prompt(interaction, reminder=True)
 
             return ret
 
@@ -113,7 +113,7 @@ These commands are only available to administrators of this server.
 
 ## Roles
 
-</roles:1204499698317262965>: Enable/disable automatically giving verified CodeGrind user, score milestones, and streak roles that will be automatically updated each day at midday (UTC).
+</roles:1204499698317262965>: Enable/disable automatically giving verified CodeGrind user, score milestones, and streak roles that will be automatically updated as your stats change.
 
 ## Notifications
 
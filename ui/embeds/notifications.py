@@ -76,3 +76,13 @@ def channel_remove_embed(
         f"**{'**,** '.join(map(lambda option: option.value, selected_options))}** "
         "notifications"
     )
+
+
+def channels_pruned_embed(channel_ids: list[int], failures: int) -> discord.Embed:
+    return failure_embed(
+        title="Notification channels removed",
+        description=f"{', '.join(f'<#{channel_id}>' for channel_id in channel_ids)} "
+        f"stopped receiving notifications, since the bot couldn't send to them on "
+        f"{failures} different days in a row. Check the bot's permissions, then use "
+        "`/notifications` to add them back.",
+    )
@@ -4,6 +4,7 @@ import discord
 from beanie.odm.operators.update.array import AddToSet, Pull
 
 from constants import NotificationOptions
+from database.cache import server_cache
 from database.models import Server
 from ui.embeds.common import failure_embed
 from ui.embeds.notifications import (
@@ -158,35 +159,36 @@ class SaveButton(discord.ui.Button):
         if adding:
             for notification_option in selected_notification_options:
                 if notification_option == NotificationOptions.MAINTENANCE:
-                    await Server.find_one(Server.id == server_id).update(
-                        AddToSet({Server.channels.maintenance: channel_id})
+                    await server_cache.update(
+                        server_id, AddToSet({Server.channels.maintenance: channel_id})
                     )
 
                 elif notification_option == NotificationOptions.DAILY_QUESTION:
-                    await Server.find_one(Server.id == server_id).update(
-                        AddToSet({Server.channels.daily_question: channel_id})
+                    await server_cache.update(
+                        server_id,
+                        AddToSet({Server.channels.daily_question: channel_id}),
                     )
 
                 elif notification_option == NotificationOptions.WINNERS:
-                    await Server.find_one(Server.id == server_id).update(
-                        AddToSet({Server.channels.winners: channel_id})
+                    await server_cache.update(
+                        server_id, AddToSet({Server.channels.winners: channel_id})
                     )
 
         else:
             for notification_option in selected_notification_options:
                 if notification_option == NotificationOptions.MAINTENANCE:
-                    await Server.find_one(Server.id == server_id).update(
-                        Pull({Server.channels.maintenance: channel_id})
+                    await server_cache.update(
+                        server_id, Pull({Server.channels.maintenance: channel_id})
                     )
 
                 elif notification_option == NotificationOptions.DAILY_QUESTION:
-                    await Server.find_one(Server.id == server_id).update(
-                        Pull({Server.channels.daily_question: channel_id})
+                    await server_cache.update(
+                        server_id, Pull({Server.channels.daily_question: channel_id})
                     )
 
                 elif notification_option == NotificationOptions.WINNERS:
-                    await Server.find_one(Server.id == server_id).update(
-                        Pull({Server.channels.winners: channel_id})
+                    await server_cache.update(
+                        server_id, Pull({Server.channels.winners: channel_id})
                     )
 
 
@@ -244,7 +246,7 @@ class SelectOperatorView(discord.ui.View):
 
         server_id = interaction.guild.id
 
-        server = await Server.find_one(Server.id == server_id)
+        server = await server_cache.get(server_id)
 
         if all(self.channel.id in channel_id for _, channel_id in server.channels):
             embed = channel_receiving_all_notification_options_embed()
@@ -277,7 +279,7 @@ class SelectOperatorView(discord.ui.View):
 
         server_id = interaction.guild.id
 
-        server = await Server.find_one(Server.id == server_id)
+        server = await server_cache.get(server_id)
 
         if all(self.channel.id not in channel_id for _, channel_id in server.channels):
             await interaction.edit_original_response(
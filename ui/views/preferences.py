@@ -4,6 +4,7 @@ import discord
 from beanie.odm.operators.update.general import Set
 
 from constants import GLOBAL_LEADERBOARD_ID
+from database.cache import preference_cache
 from database.models import Preference
 from ui.constants import PreferenceField
 
@@ -63,6 +64,8 @@ class UserPreferencesPromptView(discord.ui.View):
                 Preference.server_id == guild_id,
             ).update(Set({Preference.anonymous: not value}))
 
+        preference_cache.invalidate(user_id, guild_id)
+
     async def _increment_page(self, interaction: discord.Interaction):
         self.page_num += 1
 
@@ -0,0 +1,223 @@
+import asyncio
+from collections import Counter
+from datetime import UTC, datetime
+from typing import TYPE_CHECKING
+
+import aiohttp
+import backoff
+import discord
+from beanie import PydanticObjectId
+from beanie.odm.operators.update.general import Set
+from discord.ext import tasks
+
+from constants import DeliveryState
+from database.models import Broadcast, Server
+from utils.fanout import MAX_CONCURRENT_SENDS
+
+if TYPE_CHECKING:
+    # To prevent circular imports
+    from bot import DiscordBot
+
+# Maximum number of attempts to send to a channel when the failures are transient.
+MAX_ATTEMPTS = 5
+
+# Number of deliveries between progress reports.
+PROGRESS_REPORT_INTERVAL = 500
+
+# Time between checks for broadcasts to send.
+POLL_INTERVAL_SECONDS = 60
+
+# Broadcasts being sent by ID, kept so that their tasks aren't garbage collected.
+running_broadcasts: dict[PydanticObjectId, asyncio.Task] = {}
+
+
+async def create_broadcast(content: str, image_url: str | None = None) -> Broadcast:
+    """
+    Create a broadcast of an announcement to every server's maintenance channels.
+
+    :param content: The announcement.
+    :param image_url: The URL of an image to attach to the announcement.
+
+    :return: The broadcast, with every channel pending.
+    """
+    channel_servers = {
+        str(channel_id): server.id
+        async for server in Server.all()
+        for channel_id in server.channels.maintenance
+    }
+    broadcast = Broadcast(
+        content=content,
+        image_url=image_url,
+        deliveries={
+            channel_id: DeliveryState.PENDING for channel_id in channel_servers
+        },
+        channel_servers=channel_servers,
+    )
+    await broadcast.create()
+
+    return broadcast
+
+
+def start_broadcast(bot: "DiscordBot", broadcast: Broadcast) -> None:
+    """
+    Send a broadcast in the background.
+
+    :param broadcast: The broadcast.
+    """
+    if broadcast.id in running_broadcasts:
+        return
+
+    task = asyncio.create_task(run_broadcast(bot, broadcast))
+    running_broadcasts[broadcast.id] = task
+    task.add_done_callback(lambda _: running_broadcasts.pop(broadcast.id, None))
+
+
+@tasks.loop(seconds=POLL_INTERVAL_SECONDS, reconnect=False)
+async def schedule_broadcasts(bot: "DiscordBot") -> None:
+    """
+    Schedule to send the broadcasts that this cluster hasn't finished, i.e. the ones
+    created on another cluster or interrupted by a restart.
+    """
+    await bot.wait_until_ready()
+
+    async for broadcast in Broadcast.find(Broadcast.completed_at == None):  # noqa: E711
+        start_broadcast(bot, broadcast)
+
+
+def owns_channel(bot: "DiscordBot", broadcast: Broadcast, channel_id: str) -> bool:
+    """
+    Whether a broadcast's channel belongs to one of this cluster's servers.
+
+    :param broadcast: The broadcast.
+    :param channel_id: The channel's ID.
+    """
+    server_id = broadcast.channel_servers.get(channel_id)
+
+    # Broadcasts created before clustering are sent by the primary cluster.
+    if server_id is None:
+        return bot.is_primary_cluster
+
+    return bot.owns_guild(server_id)
+
+
+@backoff.on_exception(
+    backoff.expo,
+    (discord.errors.DiscordServerError, aiohttp.ClientError, asyncio.TimeoutError),
+    max_tries=MAX_ATTEMPTS,
+    logger=None,
+)
+async def send_with_retry(channel: discord.TextChannel, content: str) -> None:
+    """
+    Send a message, retrying with exponential backoff on transient failures. Rate
+    limits are already retried by discord.py.
+
+    :param channel: The channel to send the message to.
+    :param content: The message.
+    """
+    await channel.send(content=content)
+
+
+async def run_broadcast(bot: "DiscordBot", broadcast: Broadcast) -> None:
+    """
+    Send a broadcast to the pending channels of this cluster's servers, with a
+    bounded number of messages in flight at once, storing the delivery state of each
+    channel as it goes.
+
+    The broadcast is completed by the cluster that sends its last pending channel.
+
+    :param broadcast: The broadcast.
+    """
+    content = broadcast.content
+    if broadcast.image_url:
+        content += f"\n{broadcast.image_url}"
+
+    pending = [
+        int(channel_id)
+        for channel_id, state in broadcast.deliveries.items()
+        if state == DeliveryState.PENDING and owns_channel(bot, broadcast, channel_id)
+    ]
+    if not pending:
+        return
+
+    states = Counter(broadcast.deliveries.values())
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_SENDS)
+
+    def progress() -> str:
+        return (
+            f"{states[DeliveryState.SENT]} sent, "
+            f"{states[DeliveryState.FAILED]} failed, "
+            f"{states[DeliveryState.PENDING]} pending"
+        )
+
+    await bot.channel_logger.info(
+        f"Broadcast {broadcast.id} started on cluster {bot.config.CLUSTER_ID}: "
+        f"{len(pending)} / {len(broadcast.deliveries)} channels, {progress()}"
+    )
+
+    async def deliver(channel_id: int) -> None:
+        channel = bot.get_channel(channel_id)
+        state = DeliveryState.FAILED
+
+        if not channel:
+            bot.channel_failures.missing(
+                channel_id, broadcast.channel_servers.get(str(channel_id))
+            )
+
+        elif not isinstance(channel, discord.TextChannel):
+            bot.channel_failures.failed(channel_id)
+
+        else:
+            async with semaphore:
+                try:
+                    await send_with_retry(channel, content)
+                    state = DeliveryState.SENT
+                    bot.channel_failures.succeeded(channel_id)
+
+                except (discord.errors.Forbidden, discord.errors.NotFound):
+                    bot.logger.info(
+                        f"Forbidden to share announcement to channel with ID: "
+                        f"{channel_id}"
+                    )
+                    bot.channel_failures.failed(channel_id)
+                except (
+                    discord.errors.HTTPException,
+                    aiohttp.ClientError,
+                    asyncio.TimeoutError,
+                ) as e:
+                    bot.logger.exception(
+                        f"Failed to share announcement to channel with ID: "
+                        f"{channel_id}: {e}"
+                    )
+
+        await Broadcast.find_one(Broadcast.id == broadcast.id).update(
+            Set({f"deliveries.{channel_id}": state.value})
+        )
+
+        states[DeliveryState.PENDING] -= 1
+        states[state] += 1
+
+        delivered = states[DeliveryState.SENT] + states[DeliveryState.FAILED]
+        if delivered % PROGRESS_REPORT_INTERVAL == 0:
+            await bot.channel_logger.info(
+                f"Broadcast {broadcast.id} progress: {progress()}"
+            )
+
+    await asyncio.gather(*(deliver(channel_id) for channel_id in pending))
+    await bot.channel_failures.flush()
+
+    # The other clusters' channels may still be pending.
+    broadcast = await Broadcast.get(broadcast.id)
+    states = Counter(broadcast.deliveries.values())
+
+    if states[DeliveryState.PENDING]:
+        await bot.channel_logger.info(
+            f"Broadcast {broadcast.id} finished on cluster {bot.config.CLUSTER_ID}: "
+            f"{progress()}"
+        )
+        return
+
+    await Broadcast.find_one(Broadcast.id == broadcast.id).update(
+        Set({Broadcast.completed_at: datetime.now(UTC)})
+    )
+
+    await bot.channel_logger.info(f"Broadcast {broadcast.id} completed: {progress()}")
@@ -0,0 +1,226 @@
+from datetime import UTC, datetime
+from typing import TYPE_CHECKING
+
+import discord
+from beanie.operators import In, Or
+from pymongo import UpdateOne
+
+from database.cache import server_cache
+from database.models import ChannelFailure, Server
+from ui.embeds.notifications import channels_pruned_embed
+
+if TYPE_CHECKING:
+    # To prevent circular imports
+    from bot import DiscordBot
+
+# Number of consecutive days with failed deliveries after which a channel is
+# removed from its server's notification channels. Several fan-outs run at the same
+# reset (e.g. the daily question and the daily and weekly winners), so failures are
+# counted at most once a day.
+MAX_CONSECUTIVE_FAILURES = 3
+
+# Maximum number of servers listed in a report, to fit in a message.
+MAX_REPORTED_SERVERS = 20
+
+
+class ChannelFailureTracker:
+    """
+    Counts the consecutive days with failed deliveries to each notification channel,
+    and removes the channels that keep failing (deleted, or without permission to
+    send), so that fan-outs stop paying for them.
+
+    Deliveries are recorded in memory during a fan-out and written in batches when
+    it ends.
+
+    :param bot: The Discord bot instance.
+    """
+
+    def __init__(self, bot: "DiscordBot") -> None:
+        self.bot = bot
+        self.succeeded_ids: set[int] = set()
+        self.failed_ids: set[int] = set()
+
+    def succeeded(self, channel_id: int) -> None:
+        """
+        Record a successful delivery to a channel.
+
+        :param channel_id: The channel's ID.
+        """
+        self.failed_ids.discard(channel_id)
+        self.succeeded_ids.add(channel_id)
+
+    def failed(self, channel_id: int) -> None:
+        """
+        Record a failed delivery to a channel, that is unlikely to succeed if
+        retried.
+
+        :param channel_id: The channel's ID.
+        """
+        self.succeeded_ids.discard(channel_id)
+        self.failed_ids.add(channel_id)
+
+    def missing(self, channel_id: int, server_id: int | None) -> None:
+        """
+        Record a delivery to a channel that isn't cached. It only counts as a failure
+        if the channel's guild is available, since every channel of a guild is
+        missing while it's unavailable (e.g. during a Discord outage) or still
+        loading.
+
+        :param channel_id: The channel's ID.
+        :param server_id: The ID of the channel's server, if known.
+        """
+        guild = self.bot.get_guild(server_id) if server_id is not None else None
+
+        if guild and not guild.unavailable:
+            self.failed(channel_id)
+
+    async def flush(self) -> None:
+        """
+        Write the recorded deliveries, and remove the channels that failed too many
+        times in a row.
+        """
+        succeeded_ids, self.succeeded_ids = self.succeeded_ids, set()
+        failed_ids, self.failed_ids = self.failed_ids, set()
+
+        if succeeded_ids:
+            await ChannelFailure.find(In(ChannelFailure.id, succeeded_ids)).delete()
+
+        if not failed_ids:
+            return
+
+        now = datetime.now(UTC)
+        today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        await ChannelFailure.get_motor_collection().bulk_write(
+            [
+                UpdateOne(
+                    {"_id": channel_id},
+                    [
+                        {
+                            "$set": {
+                                # A missing `last_failed_at` (a new document) is
+                                # before any date.
+                                "failures": {
+                                    "$cond": [
+                                        {"$lt": ["$last_failed_at", today]},
+                                        {"$add": [{"$ifNull": ["$failures", 0]}, 1]},
+                                        "$failures",
+                                    ]
+                                },
+                                "last_failed_at": now,
+                            }
+                        }
+                    ],
+                    upsert=True,
+                )
+                for channel_id in failed_ids
+            ],
+            ordered=False,
+        )
+
+        dead_ids = {
+            failure.id
+            async for failure in ChannelFailure.find(
+                In(ChannelFailure.id, failed_ids),
+                ChannelFailure.failures >= MAX_CONSECUTIVE_FAILURES,
+            )
+        }
+
+        if dead_ids:
+            await self.prune(dead_ids)
+
+    async def prune(self, channel_ids: set[int]) -> None:
+        """
+        Remove channels from every server's notification channels, in one update,
+        and report them to the developer, and to the admins of this cluster's servers
+        through their remaining maintenance channels. Servers without any left only
+        see the change in `/notifications`.
+
+        :param channel_ids: The channels' IDs.
+        """
+        servers = await Server.find(
+            Or(
+                In(Server.channels.maintenance, channel_ids),
+                In(Server.channels.daily_question, channel_ids),
+                In(Server.channels.winners, channel_ids),
+            )
+        ).to_list()
+
+        await Server.get_motor_collection().update_many(
+            {"_id": {"$in": [server.id for server in servers]}},
+            {
+                "$pull": {
+                    "channels.maintenance": {"$in": list(channel_ids)},
+                    "channels.daily_question": {"$in": list(channel_ids)},
+                    "channels.winners": {"$in": list(channel_ids)},
+                }
+            },
+        )
+        await ChannelFailure.find(In(ChannelFailure.id, channel_ids)).delete()
+
+        lines = []
+        for server in servers:
+            server_cache.invalidate(server.id)
+
+            if len(lines) == MAX_REPORTED_SERVERS:
+                lines.append(
+                    f"- and {len(servers) - MAX_REPORTED_SERVERS} more servers"
+                )
+            if len(lines) > MAX_REPORTED_SERVERS:
+                continue
+
+            pruned_ids = {
+                channel_id
+                for channel_id in server.channels.maintenance
+                + server.channels.daily_question
+                + server.channels.winners
+                if channel_id in channel_ids
+            }
+            lines.append(
+                f"- Server {server.id}: "
+                + ", ".join(str(channel_id) for channel_id in sorted(pruned_ids))
+            )
+
+        for server in servers:
+            if self.bot.owns_guild(server.id):
+                await self.notify_server(server, channel_ids)
+
+        self.bot.logger.info(f"Pruned {len(channel_ids)} dead notification channels")
+        await self.bot.channel_logger.info(
+            f"Pruned **{len(channel_ids)}** notification channels after "
+            f"failed deliveries on {MAX_CONSECUTIVE_FAILURES} consecutive days:\n"
+            + "\n".join(lines)
+        )
+
+    async def notify_server(self, server: Server, channel_ids: set[int]) -> None:
+        """
+        Tell a server's admins which of its notification channels were removed,
+        through its maintenance channels that weren't.
+
+        :param server: The server, as it was before the channels were removed.
+        :param channel_ids: The IDs of every removed channel.
+        """
+        pruned_ids = sorted(
+            {
+                channel_id
+                for channel_id in server.channels.maintenance
+                + server.channels.daily_question
+                + server.channels.winners
+                if channel_id in channel_ids
+            }
+        )
+        embed = channels_pruned_embed(pruned_ids, MAX_CONSECUTIVE_FAILURES)
+
+        for channel_id in server.channels.maintenance:
+            channel = self.bot.get_channel(channel_id)
+            if channel_id in channel_ids or not isinstance(
+                channel, discord.TextChannel
+            ):
+                continue
+
+            try:
+                await channel.send(embed=embed, silent=True)
+            except discord.errors.HTTPException as e:
+                self.bot.logger.info(
+                    f"Failed to report pruned channels to channel with ID: "
+                    f"{channel_id}: {e}"
+                )
@@ -0,0 +1,166 @@
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from beanie.operators import In
+from discord.ext import tasks
+
+from database.cache import preference_cache, server_cache
+from database.models import Preference
+from utils.users import delete_users, find_orphaned_users
+
+if TYPE_CHECKING:
+    # To prevent circular imports
+    from bot import DiscordBot
+
+
+@dataclass
+class CleanupResult:
+    servers_deleted: int = 0
+    preferences_deleted: int = 0
+    users_deleted: int = 0
+
+
+class CleanupQueue:
+    """
+    Queues the deletion of data belonging to departed users and guilds, and applies
+    the deletions in batches, off the gateway event path.
+
+    :param bot: The Discord bot instance.
+    """
+
+    def __init__(self, bot: "DiscordBot") -> None:
+        self.bot = bot
+        self.removed_server_ids: set[int] = set()
+        # (user_id, server_id) pairs of users that left a server.
+        self.unlinks: set[tuple[int, int]] = set()
+        self.deleted_user_ids: set[int] = set()
+
+    def __len__(self) -> int:
+        return (
+            len(self.removed_server_ids)
+            + len(self.unlinks)
+            + len(self.deleted_user_ids)
+        )
+
+    def remove_server(self, server_id: int) -> None:
+        """
+        Queue the deletion of a server and all of its users' preferences for it.
+
+        :param server_id: The server's ID.
+        """
+        self.removed_server_ids.add(server_id)
+
+    def unlink_user_from_server(self, user_id: int, server_id: int) -> None:
+        """
+        Queue the removal of a user's profile from a server. The user is deleted if
+        they are no longer on any server's leaderboard.
+
+        :param user_id: The user's ID.
+        :param server_id: The server's ID.
+        """
+        self.unlinks.add((user_id, server_id))
+
+    def delete_user(self, user_id: int) -> None:
+        """
+        Queue the deletion of all of a user's stored information.
+
+        :param user_id: The user's ID.
+        """
+        self.deleted_user_ids.add(user_id)
+
+    async def flush(self) -> CleanupResult:
+        """
+        Apply all of the queued deletions. If they fail, they're queued again, to be
+        retried by the next flush, since the deletions can safely be reapplied.
+
+        :return: The number of deleted documents.
+        """
+        removed_server_ids, self.removed_server_ids = self.removed_server_ids, set()
+        unlinks, self.unlinks = self.unlinks, set()
+        deleted_user_ids, self.deleted_user_ids = self.deleted_user_ids, set()
+
+        try:
+            return await self._flush(removed_server_ids, unlinks, deleted_user_ids)
+        except Exception:
+            self.removed_server_ids |= removed_server_ids
+            self.unlinks |= unlinks
+            self.deleted_user_ids |= deleted_user_ids
+            raise
+
+    async def _flush(
+        self,
+        removed_server_ids: set[int],
+        unlinks: set[tuple[int, int]],
+        deleted_user_ids: set[int],
+    ) -> CleanupResult:
+        result = CleanupResult()
+        # Users that may no longer be on any server's leaderboard.
+        unlinked_user_ids: set[int] = set()
+
+        if removed_server_ids:
+            unlinked_user_ids |= set(
+                await Preference.distinct(
+                    "user_id", {"server_id": {"$in": list(removed_server_ids)}}
+                )
+            )
+
+            delete_result = await Preference.find_many(
+                In(Preference.server_id, removed_server_ids)
+            ).delete()
+            result.preferences_deleted += (
+                delete_result.deleted_count if delete_result else 0
+            )
+
+            await server_cache.delete_many(removed_server_ids)
+            result.servers_deleted = len(removed_server_ids)
+
+            for server_id in removed_server_ids:
+                preference_cache.invalidate_server(server_id)
+
+        server_id_to_user_ids: dict[int, set[int]] = {}
+        for user_id, server_id in unlinks:
+            if server_id not in removed_server_ids:
+                server_id_to_user_ids.setdefault(server_id, set()).add(user_id)
+
+        for server_id, user_ids in server_id_to_user_ids.items():
+            delete_result = await Preference.find_many(
+                Preference.server_id == server_id, In(Preference.user_id, user_ids)
+            ).delete()
+            result.preferences_deleted += (
+                delete_result.deleted_count if delete_result else 0
+            )
+            unlinked_user_ids |= user_ids
+
+            for user_id in user_ids:
+                preference_cache.invalidate(user_id, server_id)
+
+        orphaned_user_ids = await find_orphaned_users(
+            unlinked_user_ids - deleted_user_ids
+        )
+
+        users_to_delete = deleted_user_ids | orphaned_user_ids
+        await delete_users(users_to_delete)
+        result.users_deleted = len(users_to_delete)
+
+        return result
+
+
+@tasks.loop(seconds=30)
+async def schedule_cleanup(bot: "DiscordBot") -> None:
+    """
+    Schedule to apply the queued deletions.
+    """
+    if not len(bot.cleanup_queue):
+        return
+
+    try:
+        result = await bot.cleanup_queue.flush()
+    except Exception as e:
+        # The deletions stay queued for the next run.
+        bot.logger.exception(f"Cleanup failed: {e}")
+        return
+
+    bot.logger.info(
+        f"Cleanup deleted {result.servers_deleted} servers, "
+        f"{result.preferences_deleted} preferences and {result.users_deleted} users"
+    )
@@ -0,0 +1,109 @@
+from datetime import UTC
+from typing import TYPE_CHECKING
+
+from beanie import PydanticObjectId
+from discord.ext import tasks
+
+from constants import GLOBAL_LEADERBOARD_ID, Period
+from database.cache import server_cache
+from database.models import Server, StatsUpdate
+from utils.notifications import send_daily_question
+from utils.winners import deliver_winners
+
+if TYPE_CHECKING:
+    # To prevent circular imports
+    from bot import DiscordBot
+
+# Time between checks for a new stats update.
+FOLLOW_INTERVAL_SECONDS = 30
+
+
+@tasks.loop(seconds=FOLLOW_INTERVAL_SECONDS, reconnect=False)
+async def schedule_follow_stats_updates(bot: "DiscordBot") -> None:
+    """
+    Schedule to follow the stats updates of the primary cluster.
+    """
+    await bot.wait_until_ready()
+
+    try:
+        await bot.stats_update_follower.poll()
+    except Exception as e:
+        # The failed step is retried by the next poll.
+        bot.logger.exception(f"Failed to follow the stats update: {e}")
+
+
+class StatsUpdateFollower:
+    """
+    Follows the stats updates that the primary cluster runs, and sends the resulting
+    notifications to this cluster's servers, i.e. the daily question when an update
+    starts, and the winners and role changes when it completes.
+
+    Updates that ran before the cluster started aren't followed, as the primary
+    cluster doesn't catch up on missed updates either. A step is only marked as
+    followed once it succeeded, so a failed step is retried by the next poll.
+
+    :param bot: The Discord bot instance.
+    """
+
+    def __init__(self, bot: "DiscordBot") -> None:
+        self.bot = bot
+        self.initialised = False
+        self.started_id: PydanticObjectId | None = None
+        self.completed_id: PydanticObjectId | None = None
+
+    async def poll(self) -> None:
+        """
+        Check the latest stats update and follow the steps it took since the last
+        check.
+        """
+        stats_update = (
+            await StatsUpdate.find_all().sort(-StatsUpdate.started_at).first_or_none()
+        )
+
+        if not self.initialised:
+            self.initialised = True
+            if stats_update:
+                self.started_id = stats_update.id
+                if stats_update.completed_at:
+                    self.completed_id = stats_update.id
+            return
+
+        if not stats_update:
+            return
+
+        if stats_update.id != self.started_id:
+            if Period.DAY in stats_update.resets:
+                await send_daily_question(self.bot)
+
+            self.started_id = stats_update.id
+
+        if stats_update.completed_at and stats_update.id != self.completed_id:
+            async with self.bot.update_lock:
+                await self.completed(stats_update)
+
+            self.completed_id = stats_update.id
+            self.bot.role_sync_queue.start_flush()
+
+    async def completed(self, stats_update: StatsUpdate) -> None:
+        """
+        Reload the stats and send the winners and role changes of a completed stats
+        update.
+
+        :param stats_update: The stats update.
+        """
+        self.bot.logger.info("Following the stats update started")
+
+        await self.bot.score_table.load()
+        server_cache.invalidate()
+
+        servers = await Server.find_many(Server.id != GLOBAL_LEADERBOARD_ID).to_list()
+        started_at = stats_update.started_at.replace(tzinfo=UTC)
+
+        for period in stats_update.resets:
+            await deliver_winners(self.bot, servers, period, started_at)
+
+        # Synced once the update lock is released.
+        for user_id in stats_update.tier_changed_user_ids:
+            self.bot.role_sync_queue.tier_changed(user_id)
+
+        self.bot.logger.info("Following the stats update completed")
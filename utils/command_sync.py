@@ -0,0 +1,146 @@
+import hashlib
+import json
+from datetime import UTC, datetime
+from typing import TYPE_CHECKING, Any
+
+import discord
+
+from database.models import CommandTree
+
+if TYPE_CHECKING:
+    # To prevent circular imports
+    from bot import DiscordBot
+
+
+def get_signatures(
+    bot: "DiscordBot", guild: discord.abc.Snowflake | None = None
+) -> dict[str, Any]:
+    """
+    Get the payload of each app command, as sent to Discord when syncing.
+
+    Slash commands and context menus can share a name, so the commands are keyed by
+    their type too.
+
+    :param guild: The guild whose commands to get, or `None` for the global ones.
+
+    :return: The payloads, keyed by `type:name` (see `AppCommandType`).
+    """
+    payloads = [command.to_dict() for command in bot.tree.get_commands(guild=guild)]
+
+    return {f"{payload['type']}:{payload['name']}": payload for payload in payloads}
+
+
+def get_label(key: str) -> str:
+    """
+    Get the name of a command as shown to users.
+
+    :param key: The command's key (see `get_signatures`).
+
+    :return: `/name` for slash commands, or the name and type of context menus.
+    """
+    command_type, name = key.split(":", 1)
+    command_type = discord.AppCommandType(int(command_type))
+
+    if command_type == discord.AppCommandType.chat_input:
+        return f"/{name}"
+
+    return f"{name} ({command_type.name} context menu)"
+
+
+def upgrade_signatures(signatures: dict[str, Any]) -> dict[str, Any]:
+    """
+    Rekey signatures stored when commands were keyed by name only.
+
+    :param signatures: The stored payloads of the commands.
+
+    :return: The payloads, keyed like `get_signatures`.
+    """
+    return {
+        key if ":" in key else f"{payload['type']}:{payload['name']}": payload
+        for key, payload in signatures.items()
+    }
+
+
+def get_digest(signatures: dict[str, Any]) -> str:
+    """
+    Hash the app commands, independently of the order of the commands and of their
+    keys.
+
+    :param signatures: The payloads of the commands (see `get_signatures`).
+
+    :return: The hex digest.
+    """
+    return hashlib.sha256(
+        json.dumps(signatures, sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+
+def diff_signatures(before: dict[str, Any], after: dict[str, Any]) -> list[str]:
+    """
+    Describe the changes between two versions of the app commands.
+
+    :param before: The payloads of the commands before (see `get_signatures`).
+    :param after: The payloads of the commands after (see `get_signatures`).
+
+    :return: A line per added, removed or changed command.
+    """
+    lines = [f"+ {get_label(key)}" for key in sorted(after.keys() - before.keys())]
+    lines += [f"- {get_label(key)}" for key in sorted(before.keys() - after.keys())]
+
+    for key in sorted(before.keys() & after.keys()):
+        changed_fields = sorted(
+            field
+            for field in before[key].keys() | after[key].keys()
+            if before[key].get(field) != after[key].get(field)
+        )
+        if changed_fields:
+            lines.append(f"~ {get_label(key)} ({', '.join(changed_fields)})")
+
+    return lines
+
+
+async def sync_command_tree(
+    bot: "DiscordBot",
+    guild: discord.abc.Snowflake | None = None,
+    force: bool = False,
+    dry_run: bool = False,
+) -> list[str]:
+    """
+    Sync the app commands to Discord if they changed since the last sync, since
+    syncing is heavily rate limited.
+
+    :param guild: The guild to sync the commands of, or `None` for the global ones.
+    :param force: Whether to sync even if the commands didn't change.
+    :param dry_run: Whether to only report the changes, without syncing.
+
+    :return: The changes since the last sync (see `diff_signatures`).
+    """
+    scope = str(guild.id) if guild else "global"
+    signatures = get_signatures(bot, guild)
+    digest = get_digest(signatures)
+
+    synced = await CommandTree.get(scope)
+    synced_signatures = upgrade_signatures(synced.signatures) if synced else {}
+    changes = diff_signatures(synced_signatures, signatures)
+
+    if dry_run:
+        return changes
+
+    if not force and synced and synced_signatures == signatures:
+        if synced.digest != digest:
+            # Stored with the old keys, so only the stored tree needs updating.
+            synced.signatures = signatures
+            synced.digest = digest
+            await synced.save()
+
+        return changes
+
+    await bot.tree.sync(guild=guild)
+
+    await CommandTree(
+        id=scope, digest=digest, signatures=signatures, synced_at=datetime.now(UTC)
+    ).save()
+
+    bot.logger.info(f"Synced {len(signatures)} {scope} app commands")
+
+    return changes
@@ -0,0 +1,151 @@
+from datetime import UTC, datetime, timedelta
+from typing import TYPE_CHECKING
+
+import discord
+from discord.ext import tasks
+
+from database.models import ClusterStats
+
+if TYPE_CHECKING:
+    # To prevent circular imports
+    from bot import DiscordBot
+
+# Time between reports of the guild count, top.gg's default autopost interval.
+REPORT_INTERVAL_MINUTES = 30
+# Counts of clusters that haven't reported for this long are left out of the
+# totals, e.g. after the number of clusters was reduced.
+STALE_REPORT_AGE = timedelta(hours=2)
+
+
+class MemberCounter:
+    """
+    Number of guilds and members, kept up to date from guild and member join and
+    remove events, so that reporting them doesn't go through every cached member.
+
+    Members of several guilds are counted once per guild.
+
+    :param bot: The Discord bot instance.
+    """
+
+    def __init__(self, bot: "DiscordBot") -> None:
+        self.bot = bot
+        self.guilds = 0
+        self.members = 0
+
+    def guild_joined(self, guild: discord.Guild) -> None:
+        """
+        Count a guild that the bot joined.
+
+        :param guild: The guild.
+        """
+        self.guilds += 1
+        self.members += guild.member_count or 0
+
+    def guild_removed(self, guild: discord.Guild) -> None:
+        """
+        Uncount a guild that the bot was removed from.
+
+        :param guild: The guild.
+        """
+        self.guilds -= 1
+        self.members -= guild.member_count or 0
+
+    def member_joined(self) -> None:
+        """
+        Count a member that joined a guild.
+        """
+        self.members += 1
+
+    def member_removed(self) -> None:
+        """
+        Uncount a member that left a guild.
+        """
+        self.members -= 1
+
+    def recount(self) -> None:
+        """
+        Recount the guilds and members from the guilds' member counts, correcting
+        any drift from missed events.
+        """
+        guilds = len(self.bot.guilds)
+        members = sum(guild.member_count or 0 for guild in self.bot.guilds)
+
+        if (guilds, members) != (self.guilds, self.members):
+            self.bot.logger.info(
+                f"Member counter corrected from {self.guilds} guilds and "
+                f"{self.members} members to {guilds} guilds and {members} members"
+            )
+
+        self.guilds = guilds
+        self.members = members
+
+
+@tasks.loop(hours=1)
+async def schedule_recount(bot: "DiscordBot") -> None:
+    """
+    Schedule to recount the guilds and members.
+    """
+    bot.member_counter.recount()
+
+
+@tasks.loop(minutes=REPORT_INTERVAL_MINUTES)
+async def schedule_report_counts(bot: "DiscordBot") -> None:
+    """
+    Schedule to report the guild and member counts.
+    """
+    await bot.wait_until_ready()
+
+    try:
+        await report_counts(bot)
+    except Exception as e:
+        bot.logger.exception(f"Failed to report the guild count: {e}")
+
+
+async def report_counts(bot: "DiscordBot") -> None:
+    """
+    Store this cluster's guild and member counts, and have the primary cluster post
+    the totals of every cluster to top.gg, since each post replaces the previous
+    one.
+    """
+    now = datetime.now(UTC)
+    await ClusterStats(
+        id=bot.config.CLUSTER_ID,
+        guilds=bot.member_counter.guilds,
+        members=bot.member_counter.members,
+        updated_at=now,
+    ).save()
+
+    if not bot.is_primary_cluster:
+        return
+
+    totals = (
+        await ClusterStats.find(ClusterStats.updated_at >= now - STALE_REPORT_AGE)
+        .aggregate(
+            [
+                {
+                    "$group": {
+                        "_id": None,
+                        "guilds": {"$sum": "$guilds"},
+                        "members": {"$sum": "$members"},
+                        "clusters": {"$sum": 1},
+                    }
+                }
+            ]
+        )
+        .to_list()
+    )
+    total = totals[0]
+
+    if bot.topggpy:
+        await bot.topggpy.post_guild_count(
+            guild_count=total["guilds"], shard_count=bot.shard_count
+        )
+        bot.logger.info(
+            f"Posted server count ({total['guilds']}), shard count "
+            f"({bot.shard_count})"
+        )
+
+    bot.logger.info(
+        f"Total bot member count ({total['members']}) across {total['clusters']} "
+        "clusters"
+    )
@@ -0,0 +1,83 @@
+import asyncio
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Any
+
+import discord
+
+from database.monitoring import summarise
+
+if TYPE_CHECKING:
+    # To prevent circular imports
+    from bot import DiscordBot
+
+# Maximum number of messages being sent at the same time. discord.py still queues
+# requests per rate limit bucket, so this only bounds how many are in flight.
+MAX_CONCURRENT_SENDS = 16
+
+
+async def fan_out(
+    bot: "DiscordBot",
+    deliveries: list[tuple[int, int, dict[str, Any]]],
+    description: str,
+) -> int:
+    """
+    Send messages to many channels concurrently, with a bounded number of messages
+    in flight at once, and log the delivery latency percentiles.
+
+    :param deliveries: A list of `(server_id, channel_id, send_kwargs)` tuples,
+    where `send_kwargs` are passed to `channel.send`.
+    :param description: What is being sent, used for logging.
+
+    :return: The number of messages sent successfully.
+    """
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_SENDS)
+    # Time from the start of the fan-out until each message was delivered.
+    latencies: deque[float] = deque()
+    start = time.perf_counter()
+
+    async def deliver(
+        server_id: int, channel_id: int, send_kwargs: dict[str, Any]
+    ) -> bool:
+        channel = bot.get_channel(channel_id)
+
+        if not channel:
+            bot.channel_failures.missing(channel_id, server_id)
+            return False
+
+        if not isinstance(channel, discord.TextChannel):
+            bot.channel_failures.failed(channel_id)
+            return False
+
+        async with semaphore:
+            try:
+                await channel.send(**send_kwargs)
+                latencies.append((time.perf_counter() - start) * 1000)
+                bot.channel_failures.succeeded(channel_id)
+                return True
+
+            except (discord.errors.Forbidden, discord.errors.NotFound):
+                bot.logger.info(
+                    f"Forbidden to share {description} to channel with ID: "
+                    f"{channel_id}"
+                )
+                bot.channel_failures.failed(channel_id)
+            except discord.errors.HTTPException as e:
+                bot.logger.exception(
+                    f"Failed to share {description} to channel with ID: "
+                    f"{channel_id}: {e}"
+                )
+
+        return False
+
+    results = await asyncio.gather(
+        *(
+            deliver(server_id, channel_id, send_kwargs)
+            for server_id, channel_id, send_kwargs in deliveries
+        )
+    )
+
+    bot.logger.info(f"{description} delivery latency: {summarise(latencies)}")
+    await bot.channel_failures.flush()
+
+    return sum(results)
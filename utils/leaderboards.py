@@ -1,4 +1,3 @@
-import asyncio
 import math
 from datetime import UTC, datetime, timedelta
 from typing import TYPE_CHECKING
@@ -7,7 +6,8 @@ import discord
 from beanie.operators import In
 
 from constants import GLOBAL_LEADERBOARD_ID, Period, RankEmoji
-from database.models import Preference, Record, Server, User
+from database.cache import server_cache
+from database.models import Preference, Server, User
 from ui.embeds.leaderboards import empty_leaderboard_embed, leaderboard_embed
 from ui.views.leaderboards import LeaderboardPagination
 from utils.common import strftime_with_suffix
@@ -17,116 +17,43 @@ if TYPE_CHECKING:
     from bot import DiscordBot
 
 
-async def get_score(user: User, period: Period, previous: bool) -> int:
+def get_period_timestamps(
+    period: Period, now: datetime | None = None
+) -> tuple[datetime, datetime]:
     """
-    Get the score for a given period for a user.
+    Get the start timestamps of the previous and the current period.
 
-    :param user: The user to retrieve the score for.
-    :param period: The period for which to retrieve the score.
-    :param previous: Whether to get the score for the previous period.
+    :param period: The period (day, week or month).
+    :param now: The time to get the periods of, defaulting to the current time.
 
-    :return: The calculated score for the specified period.
+    :return: A tuple of the previous period's start and the current period's start.
     """
+    now = now or datetime.now(UTC)
 
-    if period == Period.ALLTIME:
-        return user.stats.submissions.score
-
-    record_timestamp_end: datetime | None = None
-    record_timestamp_start: datetime | None = None
-
-    # Determine the start and end timestamps based on the specified period
     match period:
         case Period.DAY:
             # Midnight today
-            record_timestamp_end = datetime.now(UTC).replace(
-                hour=0, minute=0, second=0, microsecond=0
-            )
-            record_timestamp_start = record_timestamp_end - timedelta(days=1)
+            current_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+            previous_start = current_start - timedelta(days=1)
 
         case Period.WEEK:
             # Midnight of the current week's start (Monday)
-            record_timestamp_end = datetime.now(UTC).replace(
+            current_start = now.replace(
                 hour=0, minute=0, second=0, microsecond=0
-            ) - timedelta(days=datetime.now(UTC).weekday())
-            record_timestamp_start = record_timestamp_end - timedelta(weeks=1)
+            ) - timedelta(days=now.weekday())
+            previous_start = current_start - timedelta(weeks=1)
 
         case Period.MONTH:
             # Midnight of the first day of the current month
-            record_timestamp_end = datetime.now(UTC).replace(
+            current_start = now.replace(
                 day=1, hour=0, minute=0, second=0, microsecond=0
             )
-            record_timestamp_start = (record_timestamp_end - timedelta(days=1)).replace(
-                day=1
-            )
-
-    if previous:
-        record_end = await Record.find_one(
-            Record.user_id == user.id,
-            Record.timestamp == record_timestamp_end,
-        )
-        if not record_end:
-            return 0
-
-        record_start = await Record.find_one(
-            Record.user_id == user.id,
-            Record.timestamp >= record_timestamp_start,
-            Record.timestamp < record_timestamp_end,
-        )
-        if not record_start:
-            return 0
-
-        score_end = record_end.submissions.score
-        score_start = record_start.submissions.score
-        return score_end - score_start
-
-    else:
-        current_score = user.stats.submissions.score
-        record = await Record.find_one(
-            Record.user_id == user.id,
-            Record.timestamp >= record_timestamp_end,
-        )
-        if not record:
-            return 0
+            previous_start = (current_start - timedelta(days=1)).replace(day=1)
 
-        previous_score = record.submissions.score
-        return current_score - previous_score
+        case _:
+            raise ValueError(f"Period {period} has no start timestamp")
 
-
-async def get_user_and_score(
-    user: User, period: Period, previous: bool
-) -> tuple[User, int]:
-    """
-    Get the score for a given period for a user.
-
-    :param period: The period for which to retrieve the score.
-    :param user_id: The ID of the user to retrieve the score for.
-    :param previous: Whether to display the leaderboard of one period before.
-
-    :return: A tuple of the user and their score.
-    """
-    score = await get_score(user, period, previous)
-    return user, score
-
-
-async def sort_users_by_score(
-    users: list[User], period: Period, previous: bool
-) -> list[User]:
-    """
-    Sort the users on a server by their score for a given period.
-
-    :param users: The users in the server.
-    :param period: The period for which to retrieve and sort the scores.
-    :param previous: Whether to display the leaderboard of one period before.
-
-    :return: A list of users sorted by their score in descending order.
-    """
-    coroutines = [get_user_and_score(user, period, previous) for user in users]
-    users_with_scores = await asyncio.gather(*coroutines)
-    sorted_users_with_score = sorted(
-        users_with_scores, key=lambda pair: pair[1], reverse=True
-    )
-
-    return sorted_users_with_score
+    return previous_start, current_start
 
 
 async def get_users_from_preferences(
@@ -153,6 +80,7 @@ async def get_users_from_preferences(
 
 
 async def generate_leaderboard_embed(
+    bot: "DiscordBot",
     period: Period,
     server_id: int,
     author_user_id: int | None = None,
@@ -177,13 +105,13 @@ async def generate_leaderboard_embed(
     :return: The leaderboard embed and view.
     """
     server_id = server_id if not global_leaderboard else GLOBAL_LEADERBOARD_ID
-    server = await Server.find_one(Server.id == server_id, fetch_links=True)
+    server = await server_cache.get(server_id)
 
     if not server:
         return empty_leaderboard_embed(), None
 
     user_id_to_preference, users = await get_users_from_preferences(server_id)
-    sorted_users_with_score = await sort_users_by_score(users, period, previous)
+    sorted_users_with_score = bot.score_table.sort_users(users, period, previous)
 
     pages: list[discord.Embed] = []
     num_pages = math.ceil(len(users) / users_per_page)
@@ -381,40 +309,3 @@ def get_rank_emoji(place: int, score: int) -> str:
                 return RankEmoji.THIRD.value
 
     return f"{place}\."  # noqa: W605
-
-
-async def send_leaderboard_winners(
-    bot: "DiscordBot", server: Server, period: Period
-) -> None:
-    """
-    Send the leaderboard winners to the specified channels on a Discord server.
-
-    Sends the leaderboard winners' embed to a list of specified channels
-    within a given Discord server. It checks each channel to ensure it's valid and a
-    text channel, and handles forbidden (permission-related) errors when attempting to
-    send the embed.
-
-    :param server: The server instance containing the list of channel IDs where the
-    leaderboard winners will be announced.
-    :param period: The period for which the leaderboard is being sent (e.g., weekly,
-    monthly).
-    """
-
-    for channel_id in server.channels.winners:
-        channel = bot.get_channel(channel_id)
-
-        if not channel or not isinstance(channel, discord.TextChannel):
-            continue
-
-        try:
-            embed, view = await generate_leaderboard_embed(
-                period, server.id, winners_only=True, previous=True
-            )
-
-            await channel.send(embed=embed, view=view, silent=True)
-
-        except discord.errors.Forbidden:
-            bot.logger.exception(
-                f"Missing permissions on channel ({channel_id}) to send leaderboard "
-                "winners."
-            )
@@ -0,0 +1,45 @@
+from typing import Iterable
+
+import discord
+
+# Maximum number of members that can be queried by ID at once.
+QUERY_MEMBERS_LIMIT = 100
+
+
+async def fetch_members(
+    guild: discord.Guild, user_ids: Iterable[int]
+) -> dict[int, discord.Member]:
+    """
+    Get the members of a guild among a set of users.
+
+    Members of chunked guilds are read from the cache. Otherwise (when the member
+    cache is lazy), they are queried through the gateway in bulk, without being
+    cached, so that memory scales with the registered users rather than with the
+    guilds' population.
+
+    :param guild: The guild.
+    :param user_ids: The users' IDs.
+
+    :raises asyncio.TimeoutError: If the gateway didn't answer a query in time.
+
+    :return: The members found, by user ID.
+    """
+    if guild.chunked:
+        return {
+            user_id: member
+            for user_id in user_ids
+            if (member := guild.get_member(user_id))
+        }
+
+    user_ids = list(user_ids)
+    members = {}
+
+    for i in range(0, len(user_ids), QUERY_MEMBERS_LIMIT):
+        for member in await guild.query_members(
+            user_ids=user_ids[i : i + QUERY_MEMBERS_LIMIT],
+            limit=QUERY_MEMBERS_LIMIT,
+            cache=False,
+        ):
+            members[member.id] = member
+
+    return members
@@ -2,16 +2,16 @@ import asyncio
 from datetime import UTC, datetime, time
 from typing import TYPE_CHECKING
 
-import discord
 from beanie.odm.operators.update.general import Set
 from discord.ext import tasks
 
 from constants import GLOBAL_LEADERBOARD_ID, Period
-from database.models import Server, User
+from database.cache import preference_cache, server_cache
+from database.models import Server, StatsUpdate, User
 from ui.embeds.problems import daily_question_embed
-from utils.leaderboards import send_leaderboard_winners
-from utils.roles import update_roles
+from utils.fanout import fan_out
 from utils.stats import update_stats
+from utils.winners import send_leaderboard_winners
 
 if TYPE_CHECKING:
     # To prevent circular imports
@@ -44,6 +44,23 @@ async def process_daily_question_and_stats_update(
     :param force_reset_week: Whether to force the weekly reset.
     :param force_reset_month: Whether to force the monthly reset.
     """
+    async with bot.update_lock:
+        await _process_daily_question_and_stats_update(
+            bot, update_stats, force_reset_day, force_reset_week, force_reset_month
+        )
+
+    # Every guild's roles are also swept weekly by `schedule_role_sync`, in case
+    # any change was missed.
+    bot.role_sync_queue.start_flush()
+
+
+async def _process_daily_question_and_stats_update(
+    bot: "DiscordBot",
+    update_stats: bool,
+    force_reset_day: bool,
+    force_reset_week: bool,
+    force_reset_month: bool,
+) -> None:
     bot.logger.info("Sending daily notifications and updating stats started")
     await bot.channel_logger.info("Started updating")
 
@@ -57,79 +74,87 @@ async def process_daily_question_and_stats_update(
         start.day == 1 and start.hour == 0 and start.minute == 0
     ) or force_reset_month
 
-    midday = start.hour == 12 and start.minute == 0
-
-    if reset_day:
-        embed = await daily_question_embed(bot)
+    resets = [
+        period
+        for period, reset in (
+            (Period.DAY, reset_day),
+            (Period.WEEK, reset_week),
+            (Period.MONTH, reset_month),
+        )
+        if reset
+    ]
 
-        async for server in Server.all(fetch_links=True):
-            await send_daily_question(bot, server, embed)
+    # Followed by the other clusters, which send the notifications to their own
+    # servers.
+    stats_update = StatsUpdate(started_at=start, resets=resets)
+    await stats_update.create()
 
-        bot.logger.info("Daily question sent to all servers")
+    # Sent alongside the stats update, which doesn't depend on it.
+    daily_question_task = (
+        asyncio.create_task(send_daily_question(bot)) if reset_day else None
+    )
 
     if update_stats:
         await update_all_user_stats(bot, reset_day)
 
-    async for server in Server.all():
-        await Server.find_one(Server.id == server.id).update(
-            Set(
-                {
-                    Server.last_update_start: start,
-                    Server.last_update_end: datetime.now(UTC),
-                }
-            )
-        )
+    # Reloaded after the resets as well, since the periods' baselines have moved.
+    await bot.score_table.load()
 
-        if server.id == GLOBAL_LEADERBOARD_ID:
-            continue
+    await Server.find_all().update(
+        Set(
+            {
+                Server.last_update_start: start,
+                Server.last_update_end: datetime.now(UTC),
+            }
+        )
+    )
+    server_cache.invalidate()
 
-        if reset_day:
-            await send_leaderboard_winners(bot, server, Period.DAY)
+    servers = await Server.find_many(Server.id != GLOBAL_LEADERBOARD_ID).to_list()
 
-        if reset_week:
-            await send_leaderboard_winners(bot, server, Period.WEEK)
+    for period in resets:
+        await send_leaderboard_winners(bot, servers, period)
 
-        if reset_month:
-            await send_leaderboard_winners(bot, server, Period.MONTH)
+    if daily_question_task:
+        try:
+            await daily_question_task
+        except Exception as e:
+            bot.logger.exception(f"Failed to send the daily question: {e}")
 
-        if midday:
-            if guild := bot.get_guild(server.id):
-                try:
-                    await update_roles(guild, server.id)
-                except discord.errors.Forbidden:
-                    # Missing permissions are handled inside update_roles, so it
-                    # shouldn't raise an error.
-                    bot.logger.info(
-                        f"Forbidden to add roles to members of server with ID: "
-                        f"{server.id}"
-                    )
+    stats_update.tier_changed_user_ids = list(bot.role_sync_queue.user_ids)
+    stats_update.completed_at = datetime.now(UTC)
+    await stats_update.save()
 
     bot.logger.info("Sending daily notifications and updating stats completed")
+    # Metrics must never fail the update.
+    try:
+        bot.logger.info(preference_cache.stats())
+        for line in bot.mongodb_command_listener.report():
+            bot.logger.info(f"MongoDB command latency - {line}")
+        for line in bot.mongodb_pool_listener.report():
+            bot.logger.info(f"MongoDB connection pool - {line}")
+    except Exception as e:
+        bot.logger.exception(f"Failed to report the metrics: {e}")
     await bot.channel_logger.info("Completed updating", include_error_counts=True)
 
 
-async def send_daily_question(
-    bot: "DiscordBot", server: Server, embed: discord.Embed
-) -> None:
+async def send_daily_question(bot: "DiscordBot") -> None:
     """
-    Send the daily question to the server's daily question channels.
-
-    :param server: The server to send the daily question to (with links fetched).
-    :param embed: The embed containing the daily question.
+    Send the daily question to the daily question channels of this cluster's
+    servers.
     """
-    for channel_id in server.channels.daily_question:
-        channel = bot.get_channel(channel_id)
+    embed = await daily_question_embed(bot)
 
-        if not channel or not isinstance(channel, discord.TextChannel):
-            continue
+    deliveries = [
+        (server.id, channel_id, {"embed": embed, "silent": True})
+        async for server in Server.all()
+        if bot.owns_guild(server.id)
+        for channel_id in server.channels.daily_question
+    ]
 
-        try:
-            await channel.send(embed=embed, silent=True)
-        except discord.errors.Forbidden:
-            bot.logger.info(
-                f"Forbidden to share daily question to channel with ID: "
-                f"{channel_id}"
-            )
+    sent = await fan_out(bot, deliveries, "daily question")
+
+    bot.logger.info(f"Daily question sent to {sent} / {len(deliveries)} channels")
 
 
 async def update_all_user_stats(bot: "DiscordBot", reset_day: bool = False) -> None:
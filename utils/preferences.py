@@ -2,7 +2,7 @@ from datetime import UTC, datetime
 
 import discord
 
-from database.models import Preference
+from database.cache import preference_cache
 from ui.embeds.preferences import preferences_update_prompt_embeds
 from ui.views.preferences import UserPreferencesPromptView
 
@@ -21,10 +21,7 @@ async def update_user_preferences_prompt(
     sent only if the preference has not been updated in over 30 days.
     """
 
-    preference = await Preference.find_one(
-        Preference.user_id == interaction.user.id,
-        Preference.server_id == interaction.guild.id,
-    )
+    preference = await preference_cache.get(interaction.user.id, interaction.guild.id)
 
     if not preference:
         return
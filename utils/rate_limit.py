@@ -0,0 +1,44 @@
+import asyncio
+import time
+
+
+class RateLimiter:
+    """
+    Token bucket that caps the rate of a kind of Discord API call, shared by every
+    task making those calls, so that background jobs leave room for interactions.
+
+    It isn't a budget for every Discord API call: discord.py already waits for each
+    route's rate limit and for the global one. It's only used for the bulk role
+    edits of role syncs (`bot.role_edit_limiter`), which would otherwise use up the
+    guilds' member edit rate limits that interactions also need. Member queries,
+    fan-out sends and role creation don't wait for it.
+
+    :param calls_per_second: The sustained rate of calls.
+    :param burst: The maximum number of calls made at once after being idle.
+    """
+
+    def __init__(self, calls_per_second: float, burst: int) -> None:
+        self.calls_per_second = calls_per_second
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """
+        Wait until a call fits in the rate, and spend it.
+        """
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.burst,
+                    self.tokens + (now - self.updated_at) * self.calls_per_second,
+                )
+                self.updated_at = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self.tokens) / self.calls_per_second)
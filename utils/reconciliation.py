@@ -0,0 +1,83 @@
+import asyncio
+from typing import TYPE_CHECKING
+
+from constants import GLOBAL_LEADERBOARD_ID
+from database.models import Preference, Server, User
+from utils.members import fetch_members
+
+if TYPE_CHECKING:
+    # To prevent circular imports
+    from bot import DiscordBot
+
+
+async def reconcile_guilds_and_members(bot: "DiscordBot") -> None:
+    """
+    Prune the data of guilds the bot was removed from, and of members that left
+    their guild, while the bot was offline.
+
+    The guilds and their members are diffed against the database in bulk, and the
+    orphans are deleted in batches by the cleanup queue.
+    """
+    if not bot.guilds:
+        # Nothing to diff against, so don't risk deleting every server.
+        return
+
+    bot.logger.info("Reconciling guilds and members started")
+
+    guild_ids = {guild.id for guild in bot.guilds}
+    server_ids = set(
+        await Server.distinct("_id", {"_id": {"$ne": GLOBAL_LEADERBOARD_ID}})
+    )
+
+    for server_id in server_ids - guild_ids:
+        # The other clusters' guilds aren't in this cluster's guilds.
+        if bot.owns_guild(server_id):
+            bot.cleanup_queue.remove_server(server_id)
+
+    server_id_to_user_ids: dict[int, list[int]] = {
+        registered["_id"]: registered["user_ids"]
+        async for registered in Preference.find_many(
+            Preference.server_id != GLOBAL_LEADERBOARD_ID
+        ).aggregate(
+            [{"$group": {"_id": "$server_id", "user_ids": {"$push": "$user_id"}}}]
+        )
+    }
+
+    for guild in bot.guilds:
+        if guild.unavailable or guild.id not in server_id_to_user_ids:
+            continue
+
+        user_ids = server_id_to_user_ids[guild.id]
+
+        try:
+            members = await fetch_members(guild, user_ids)
+        except asyncio.TimeoutError:
+            # Without the members, every user would look like they left.
+            bot.logger.info(f"Timed out fetching members of server with ID: {guild.id}")
+            continue
+
+        for user_id in user_ids:
+            if user_id not in members:
+                bot.cleanup_queue.unlink_user_from_server(user_id, guild.id)
+
+    # Users that weren't deleted when they left their last guild, which is the same
+    # for every cluster.
+    if bot.is_primary_cluster:
+        user_ids = set(await User.distinct("_id"))
+        linked_user_ids = set(
+            await Preference.distinct(
+                "user_id", {"server_id": {"$ne": GLOBAL_LEADERBOARD_ID}}
+            )
+        )
+
+        for user_id in user_ids - linked_user_ids:
+            bot.cleanup_queue.delete_user(user_id)
+
+    result = await bot.cleanup_queue.flush()
+
+    bot.logger.info("Reconciling guilds and members completed")
+    await bot.channel_logger.info(
+        f"Reconciliation pruned **{result.servers_deleted}** servers, "
+        f"**{result.preferences_deleted}** preferences and **{result.users_deleted}** "
+        f"users, reclaiming **{result.users_deleted}** refresh slots"
+    )
@@ -0,0 +1,218 @@
+from bisect import bisect_left
+from datetime import datetime
+
+from beanie.odm.operators.update.general import Set
+from beanie.operators import Exists, In
+from pymongo.errors import DuplicateKeyError
+
+from database.models import (
+    BucketScoresView,
+    LanguageProblemCount,
+    Record,
+    RecordBucket,
+    SkillsProblemCount,
+    Submissions,
+)
+from database.models.record_bucket import (
+    day_key,
+    delta_encode,
+    languages_to_counts,
+    month_start,
+    skills_to_counts,
+    submissions_to_counts,
+)
+
+
+async def save_bucket_record(
+    user_id: int,
+    timestamp: datetime,
+    submissions: Submissions,
+    languages: dict[str, int],
+    skills: dict[str, int],
+) -> None:
+    """
+    Store a daily record in the user's bucket for the month, unless the bucket
+    already has a record for that day.
+
+    :param user_id: The user's ID.
+    :param timestamp: The record's timestamp.
+    :param submissions: The user's submissions.
+    :param languages: The problem count of each language.
+    :param skills: The problem count of each skill.
+    """
+    month = month_start(timestamp)
+    key = day_key(timestamp)
+
+    bucket = await RecordBucket.find_one(
+        RecordBucket.user_id == user_id, RecordBucket.month == month
+    )
+
+    if not bucket:
+        try:
+            await RecordBucket(
+                user_id=user_id,
+                month=month,
+                submissions={key: submissions_to_counts(submissions)},
+                languages=languages,
+                skills=skills,
+            ).create()
+            return
+        except DuplicateKeyError:
+            # Created concurrently, so the day is added to that bucket instead.
+            bucket = await RecordBucket.find_one(
+                RecordBucket.user_id == user_id, RecordBucket.month == month
+            )
+
+    if key in bucket.submissions:
+        return
+
+    languages_before, skills_before = bucket.counts_before(key)
+
+    # The day is only set if it still isn't, in case it was set concurrently.
+    await RecordBucket.find_one(
+        RecordBucket.id == bucket.id, Exists(f"submissions.{key}", False)
+    ).update(
+        Set(
+            {
+                f"submissions.{key}": submissions_to_counts(submissions),
+                f"languages_deltas.{key}": delta_encode(languages_before, languages),
+                f"skills_deltas.{key}": delta_encode(skills_before, skills),
+            }
+        )
+    )
+
+
+async def save_daily_record(
+    user_id: int,
+    timestamp: datetime,
+    submissions: Submissions,
+    languages_problem_count: list[LanguageProblemCount] | None = None,
+    skills_problem_count: SkillsProblemCount | None = None,
+) -> None:
+    """
+    Store a user's daily record, both as a time series record and in the user's
+    record bucket for the month.
+
+    Records are keyed by user and day, and the first record stored for a day is
+    kept, so storing it again (e.g. when a reset is rerun) does nothing. The first
+    record is the one closest to the start of the day, which is what it stands for.
+
+    :param user_id: The user's ID.
+    :param timestamp: The record's timestamp.
+    :param submissions: The user's submissions.
+    :param languages_problem_count: The user's language problem counts.
+    :param skills_problem_count: The user's skill problem counts.
+    """
+    languages_problem_count = languages_problem_count or []
+    skills_problem_count = skills_problem_count or SkillsProblemCount()
+
+    # Time series collections don't support upserts or unique indexes.
+    if not await Record.find_one(
+        Record.user_id == user_id, Record.timestamp == timestamp
+    ):
+        await Record(
+            timestamp=timestamp,
+            user_id=user_id,
+            submissions=submissions,
+            languages_problem_count=languages_problem_count,
+            skills_problem_count=skills_problem_count,
+        ).create()
+
+    await save_bucket_record(
+        user_id,
+        timestamp,
+        submissions,
+        languages_to_counts(languages_problem_count),
+        skills_to_counts(skills_problem_count),
+    )
+
+
+async def fetch_first_scores(
+    windows: list[tuple[datetime, datetime | None]],
+    buckets: bool,
+    user_ids: set[int] | None = None,
+) -> list[dict[int, int]]:
+    """
+    Get each user's earliest recorded score within each of several time windows,
+    with a single query.
+
+    :param windows: The `(start, end)` windows, where the start is inclusive and the
+    end is exclusive, or `None` for no end.
+    :param buckets: Whether to read the record buckets instead of the time series
+    records.
+    :param user_ids: The users to get the scores of, or `None` for every user.
+
+    :return: For each window, the score of each user that has a record in it.
+    """
+    if buckets:
+        return await _fetch_first_scores_from_buckets(windows, user_ids)
+
+    query = Record.find(Record.timestamp >= min(start for start, _ in windows))
+    if user_ids is not None:
+        query = query.find(In(Record.user_id, user_ids))
+
+    # `$min` compares `(timestamp, score)` pairs, so ties between records with the
+    # same timestamp are broken by score, and it ignores records outside the window.
+    group: dict = {"_id": "$user_id"}
+    for i, (start, end) in enumerate(windows):
+        in_window = [{"$gte": ["$timestamp", start]}]
+        if end:
+            in_window.append({"$lt": ["$timestamp", end]})
+
+        group[f"window_{i}"] = {
+            "$min": {
+                "$cond": [
+                    {"$and": in_window},
+                    {"timestamp": "$timestamp", "score": "$submissions.score"},
+                    "$$REMOVE",
+                ]
+            }
+        }
+
+    first_scores: list[dict[int, int]] = [{} for _ in windows]
+
+    async for user in query.aggregate([{"$group": group}]):
+        for i, scores in enumerate(first_scores):
+            if first := user.get(f"window_{i}"):
+                scores[user["_id"]] = first["score"]
+
+    return first_scores
+
+
+async def _fetch_first_scores_from_buckets(
+    windows: list[tuple[datetime, datetime | None]],
+    user_ids: set[int] | None = None,
+) -> list[dict[int, int]]:
+    """
+    Get each user's earliest recorded score within each of several time windows,
+    reading every bucket needed in one query.
+    """
+    first_scores: list[dict[int, int]] = [{} for _ in windows]
+
+    # Timestamps read from the database are naive UTC.
+    windows = [
+        (start.replace(tzinfo=None), end.replace(tzinfo=None) if end else None)
+        for start, end in windows
+    ]
+
+    query = RecordBucket.find(
+        RecordBucket.month >= month_start(min(start for start, _ in windows))
+    )
+    if user_ids is not None:
+        query = query.find(In(RecordBucket.user_id, user_ids))
+
+    # Buckets are read in chronological order, so the first score found for a user
+    # within a window is their earliest one.
+    async for bucket in query.sort(+RecordBucket.month).project(BucketScoresView):
+        keys = sorted(bucket.submissions)
+        days = [bucket.month.replace(day=int(key)) for key in keys]
+
+        for scores, (start, end) in zip(first_scores, windows):
+            if bucket.user_id in scores:
+                continue
+
+            i = bisect_left(days, start)
+            if i < len(days) and (not end or days[i] < end):
+                scores[bucket.user_id] = bucket.submissions[keys[i]][3]
+
+    return first_scores
@@ -0,0 +1,82 @@
+import asyncio
+import contextlib
+from typing import TYPE_CHECKING, AsyncIterator
+
+import discord
+
+if TYPE_CHECKING:
+    # To prevent circular imports
+    from bot import DiscordBot
+
+# Maximum time to wait for the stats update to finish before restarting.
+UPDATE_DRAIN_TIMEOUT_SECONDS = 15 * 60
+# Maximum time to wait for the interactions being handled to finish.
+INTERACTION_DRAIN_TIMEOUT_SECONDS = 30
+
+
+class InFlightCounter:
+    """
+    Counts the interactions being handled, so that a restart can wait for them to
+    finish.
+    """
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.idle = asyncio.Event()
+        self.idle.set()
+
+    def __len__(self) -> int:
+        return self.count
+
+    @contextlib.asynccontextmanager
+    async def track(self) -> AsyncIterator[None]:
+        """
+        Count an interaction while it's being handled.
+        """
+        self.count += 1
+        self.idle.clear()
+
+        try:
+            yield
+        finally:
+            self.count -= 1
+            if self.count == 0:
+                self.idle.set()
+
+
+async def restart(bot: "DiscordBot") -> None:
+    """
+    Restart the bot gracefully: wait for the stats update and the interactions being
+    handled to finish, close the connections, and let `main.py` replace the process
+    with a new one.
+
+    The update lock is held until the process is replaced, so that no stats update,
+    record retention or role sweep starts in the meantime. Those jobs store their
+    progress in checkpoints, so the new process picks up where they left off.
+    """
+    bot.logger.info("Restart: draining started")
+    await bot.change_presence(
+        status=discord.Status.do_not_disturb,
+        activity=discord.Game(name="Restarting"),
+    )
+
+    try:
+        await asyncio.wait_for(bot.update_lock.acquire(), UPDATE_DRAIN_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        bot.logger.warning("Restart: timed out waiting for the stats update")
+
+    try:
+        await asyncio.wait_for(
+            bot.in_flight_interactions.idle.wait(), INTERACTION_DRAIN_TIMEOUT_SECONDS
+        )
+    except asyncio.TimeoutError:
+        bot.logger.warning(
+            f"Restart: timed out waiting for {len(bot.in_flight_interactions)} "
+            "interactions"
+        )
+
+    bot.logger.info("Restart: draining completed")
+    await bot.channel_logger.info("Restarting")
+
+    bot.restarting = True
+    await bot.close()
@@ -0,0 +1,181 @@
+import asyncio
+from datetime import UTC, datetime, time, timedelta
+from typing import TYPE_CHECKING
+
+from beanie.operators import In
+from discord.ext import tasks
+from pydantic import BaseModel, Field
+
+from database.models import Checkpoint, Record, User
+
+if TYPE_CHECKING:
+    # To prevent circular imports
+    from bot import DiscordBot
+
+CHECKPOINT_ID = "record_retention"
+
+# Daily records are needed as baselines for the current and previous day, week and
+# month, which go back at most two months.
+MIN_DAILY_RETENTION_DAYS = 62
+
+# Number of users whose records are rolled up per batch.
+USERS_PER_BATCH = 100
+# Number of records deleted per query.
+DELETE_BATCH_SIZE = 1_000
+# Maximum number of batches per run, and the pause between them, so that the job
+# never holds the database for long.
+MAX_BATCHES_PER_RUN = 50
+BATCH_PAUSE_SECONDS = 1
+# Minimum time between the start of two passes over every user.
+PASS_INTERVAL = timedelta(days=1)
+
+
+class UserIdView(BaseModel):
+    id: int = Field(alias="_id")
+
+
+@tasks.loop(
+    # Halfway between the stats updates, which run on the hour and half hour.
+    time=[time(hour=hour, minute=15) for hour in range(24)],
+    reconnect=False,
+)
+async def schedule_record_retention(bot: "DiscordBot") -> None:
+    """
+    Schedule to roll up old records.
+    """
+    await roll_up_records(bot)
+
+
+async def roll_up_records(bot: "DiscordBot") -> None:
+    """
+    Roll up old daily records, continuing the current pass over the users from its
+    checkpoint.
+
+    Records older than `RECORD_DAILY_RETENTION_DAYS` are reduced to the first record
+    of each week and month, and records older than `RECORD_WEEKLY_RETENTION_DAYS`
+    to the first record of each month. Leaderboards only ever use a user's first
+    record in a period as its baseline, so those are the records that are kept.
+
+    The job stops early while the stats are being updated.
+    """
+    checkpoint = await Checkpoint.get(CHECKPOINT_ID) or Checkpoint(id=CHECKPOINT_ID)
+
+    now = datetime.now(UTC)
+    if (
+        checkpoint.cursor is None
+        and checkpoint.completed_at
+        and now - checkpoint.completed_at.replace(tzinfo=UTC) < PASS_INTERVAL
+    ):
+        return
+
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    daily_cutoff = today - timedelta(
+        days=max(bot.config.RECORD_DAILY_RETENTION_DAYS, MIN_DAILY_RETENTION_DAYS)
+    )
+    weekly_cutoff = today - timedelta(
+        days=max(
+            bot.config.RECORD_WEEKLY_RETENTION_DAYS,
+            bot.config.RECORD_DAILY_RETENTION_DAYS,
+            MIN_DAILY_RETENTION_DAYS,
+        )
+    )
+
+    deleted = 0
+
+    for _ in range(MAX_BATCHES_PER_RUN):
+        if bot.update_lock.locked():
+            bot.logger.info("Record retention paused while the stats are updated")
+            break
+
+        query = User.find_all()
+        if checkpoint.cursor is not None:
+            query = User.find(User.id > checkpoint.cursor)
+
+        users = (
+            await query.sort(+User.id)
+            .limit(USERS_PER_BATCH)
+            .project(UserIdView)
+            .to_list()
+        )
+
+        if not users:
+            checkpoint.cursor = None
+            checkpoint.completed_at = datetime.now(UTC)
+            bot.logger.info("Record retention pass completed")
+            break
+
+        deleted += await roll_up_user_records(
+            {user.id for user in users}, daily_cutoff, weekly_cutoff
+        )
+
+        checkpoint.cursor = users[-1].id
+        checkpoint.updated_at = datetime.now(UTC)
+        await checkpoint.save()
+
+        await asyncio.sleep(BATCH_PAUSE_SECONDS)
+
+    checkpoint.updated_at = datetime.now(UTC)
+    await checkpoint.save()
+
+    if deleted:
+        bot.logger.info(f"Record retention deleted {deleted} records")
+
+
+async def roll_up_user_records(
+    user_ids: set[int], daily_cutoff: datetime, weekly_cutoff: datetime
+) -> int:
+    """
+    Roll up the old records of a batch of users.
+
+    :param user_ids: The users' IDs.
+    :param daily_cutoff: Records before this are reduced to the first record of each
+    week and month.
+    :param weekly_cutoff: Records before this are reduced to the first record of
+    each month.
+
+    :return: The number of records deleted.
+    """
+    redundant_ids = []
+
+    async for group in Record.find(
+        In(Record.user_id, user_ids), Record.timestamp < daily_cutoff
+    ).aggregate(
+        [
+            {"$sort": {"timestamp": 1, "_id": 1}},
+            {
+                "$group": {
+                    # Weeks and months don't align, so a week that spans two months
+                    # is split in two, to keep the first record of both.
+                    "_id": {
+                        "user_id": "$user_id",
+                        "month": {
+                            "$dateTrunc": {"date": "$timestamp", "unit": "month"}
+                        },
+                        "week": {
+                            "$cond": [
+                                {"$lt": ["$timestamp", weekly_cutoff]},
+                                None,
+                                {
+                                    "$dateTrunc": {
+                                        "date": "$timestamp",
+                                        "unit": "week",
+                                        "startOfWeek": "monday",
+                                    }
+                                },
+                            ]
+                        },
+                    },
+                    "ids": {"$push": "$_id"},
+                }
+            },
+            {"$match": {"ids.1": {"$exists": True}}},
+        ]
+    ):
+        redundant_ids.extend(group["ids"][1:])
+
+    for i in range(0, len(redundant_ids), DELETE_BATCH_SIZE):
+        await Record.find(
+            In(Record.id, redundant_ids[i : i + DELETE_BATCH_SIZE])
+        ).delete()
+
+    return len(redundant_ids)
@@ -0,0 +1,230 @@
+import asyncio
+import zlib
+from datetime import UTC, datetime, time
+from typing import TYPE_CHECKING
+
+import discord
+from beanie.operators import In
+from discord.ext import tasks
+
+from constants import GLOBAL_LEADERBOARD_ID
+from database.models import Checkpoint, Preference
+from utils.members import fetch_members
+from utils.roles import (
+    RoleStatsView,
+    fetch_role_stats,
+    get_role_index,
+    sync_member_roles,
+    update_roles,
+)
+
+if TYPE_CHECKING:
+    # To prevent circular imports
+    from bot import DiscordBot
+
+
+# Every guild's roles are swept once a week, in one of the week's half hour slots.
+SLOT_SECONDS = 30 * 60
+SLOTS_PER_WEEK = 7 * 24 * 60 * 60 // SLOT_SECONDS
+
+# Sustained rate and burst of role edits, shared by every role sync.
+ROLE_EDITS_PER_SECOND = 2
+ROLE_EDITS_BURST = 10
+
+
+def get_slot(guild_id: int) -> int:
+    """
+    Get the slot of the week in which a guild's roles are swept. Guilds are spread
+    evenly across the slots by hashing their IDs.
+
+    :param guild_id: The guild's ID.
+
+    :return: The slot, from 0 to `SLOTS_PER_WEEK - 1`.
+    """
+    return zlib.crc32(guild_id.to_bytes(8, "big")) % SLOTS_PER_WEEK
+
+
+@tasks.loop(
+    # Between the stats updates, which run on the hour and half hour.
+    time=[time(hour=hour, minute=minute) for hour in range(24) for minute in [20, 50]],
+    reconnect=False,
+)
+async def schedule_role_sync(bot: "DiscordBot") -> None:
+    """
+    Schedule to sweep the roles of the guilds in the current slot.
+    """
+    await sweep_due_guilds(bot)
+
+
+async def sweep_due_guilds(bot: "DiscordBot") -> None:
+    """
+    Sync the roles of every member of the guilds whose slot is due, including the
+    slots missed since the last sweep (e.g. during a restart), up to a week's worth.
+
+    The last swept slot is stored after each slot, so that a restart doesn't start
+    the week's sweep over. Slots are left for the next run while the stats are being
+    updated.
+    """
+    if bot.update_lock.locked():
+        return
+
+    # Each cluster sweeps its own guilds.
+    checkpoint_id = f"role_sync_{bot.config.CLUSTER_ID}"
+    checkpoint = await Checkpoint.get(checkpoint_id) or Checkpoint(id=checkpoint_id)
+
+    current_slot = int(datetime.now(UTC).timestamp()) // SLOT_SECONDS
+    first_slot = current_slot
+    if checkpoint.cursor is not None:
+        first_slot = max(checkpoint.cursor + 1, current_slot - SLOTS_PER_WEEK + 1)
+
+    slot_to_guilds: dict[int, list[discord.Guild]] = {}
+    for guild in bot.guilds:
+        slot_to_guilds.setdefault(get_slot(guild.id), []).append(guild)
+
+    # Shared by the guilds, since users can be on several of them.
+    lookup: dict[int, RoleStatsView] = {}
+    guilds_swept = 0
+    edited = 0
+
+    for slot in range(first_slot, current_slot + 1):
+        for guild in slot_to_guilds.get(slot % SLOTS_PER_WEEK, []):
+            if guild.unavailable:
+                continue
+
+            try:
+                edited += await update_roles(
+                    guild, guild.id, bot.role_edit_limiter, lookup
+                )
+                guilds_swept += 1
+            except discord.errors.Forbidden:
+                bot.logger.info(
+                    f"Forbidden to add roles to members of server with ID: "
+                    f"{guild.id}"
+                )
+            except asyncio.TimeoutError:
+                bot.logger.info(
+                    f"Timed out fetching members of server with ID: {guild.id}"
+                )
+
+        checkpoint.cursor = slot
+        checkpoint.updated_at = datetime.now(UTC)
+        await checkpoint.save()
+
+    if guilds_swept:
+        bot.logger.info(
+            f"Role sweep of {guilds_swept} servers updated roles for {edited} members"
+        )
+
+
+class RoleSyncQueue:
+    """
+    Collects the users whose streak or milestone tier changed during the stats
+    update, so that only their roles are synced, in every guild they're on.
+
+    :param bot: The Discord bot instance.
+    """
+
+    def __init__(self, bot: "DiscordBot") -> None:
+        self.bot = bot
+        self.user_ids: set[int] = set()
+        self.flush_task: asyncio.Task | None = None
+
+    def __len__(self) -> int:
+        return len(self.user_ids)
+
+    def tier_changed(self, user_id: int) -> None:
+        """
+        Queue a user whose tier changed.
+
+        :param user_id: The user's ID.
+        """
+        self.user_ids.add(user_id)
+
+    def start_flush(self) -> None:
+        """
+        Sync the roles of the queued users in the background.
+
+        The edits wait for the role edit limiter, so a flush can take minutes
+        and must not hold the update lock. Users queued while a flush is running are
+        left for the next one.
+        """
+        if not self.user_ids:
+            return
+
+        if self.flush_task and not self.flush_task.done():
+            self.bot.logger.info(
+                f"Role sync of {len(self)} users left for the next update, since the "
+                "previous one is still running"
+            )
+            return
+
+        self.flush_task = asyncio.create_task(self._flush_in_background())
+
+    async def _flush_in_background(self) -> None:
+        queued = len(self)
+
+        try:
+            edited = await self.flush()
+        except Exception as e:
+            # The weekly sweep still catches up on these users.
+            self.bot.logger.exception(
+                f"Failed to sync the roles of {queued} users: {e}"
+            )
+            return
+
+        self.bot.logger.info(
+            f"Roles updated for {edited} members of {queued} users whose tier changed"
+        )
+
+    async def flush(self) -> int:
+        """
+        Sync the roles of the queued users.
+
+        :return: The number of members whose roles were changed.
+        """
+        user_ids, self.user_ids = self.user_ids, set()
+        if not user_ids:
+            return 0
+
+        lookup: dict[int, RoleStatsView] = {}
+        await fetch_role_stats(user_ids, lookup)
+        edited = 0
+
+        server_id_to_user_ids: dict[int, list[int]] = {
+            registered["_id"]: registered["user_ids"]
+            async for registered in Preference.find(
+                In(Preference.user_id, user_ids),
+                Preference.server_id != GLOBAL_LEADERBOARD_ID,
+            ).aggregate(
+                [{"$group": {"_id": "$server_id", "user_ids": {"$push": "$user_id"}}}]
+            )
+        }
+
+        for server_id, server_user_ids in server_id_to_user_ids.items():
+            guild = self.bot.get_guild(server_id)
+            if not guild or not guild.me.guild_permissions.manage_roles:
+                continue
+
+            try:
+                members = await fetch_members(guild, server_user_ids)
+            except asyncio.TimeoutError:
+                self.bot.logger.info(
+                    f"Timed out fetching members of server with ID: {server_id}"
+                )
+                continue
+
+            role_index = get_role_index(guild)
+
+            for member in members.values():
+                if not (user := lookup.get(member.id)):
+                    continue
+
+                try:
+                    edited += await sync_member_roles(
+                        role_index, member, user, self.bot.role_edit_limiter
+                    )
+                except discord.errors.Forbidden:
+                    # The member's top role is above the bot's.
+                    continue
+
+        return edited
@@ -1,7 +1,13 @@
+from bisect import bisect_right
+
 import discord
+from beanie.operators import In
+from pydantic import BaseModel, Field
 
 from constants import MILESTONE_ROLES, STREAK_ROLES, VERIFIED_ROLE
-from database.models import Preference, User
+from database.models import Preference, Stats, User
+from utils.members import fetch_members
+from utils.rate_limit import RateLimiter
 
 
 async def create_roles_from_string(guild: discord.Guild, role: str) -> None:
@@ -95,102 +101,230 @@ async def remove_roles(guild: discord.Guild) -> None:
     await remove_roles_from_dict(guild, STREAK_ROLES)
 
 
-async def update_roles(guild: discord.Guild, server_id: int) -> None:
+STREAK_THRESHOLDS = sorted(STREAK_ROLES)
+MILESTONE_THRESHOLDS = sorted(MILESTONE_ROLES)
+
+# Maximum number of users fetched per query.
+USER_LOOKUP_CHUNK_SIZE = 1_000
+
+
+class RoleStatsView(BaseModel):
+    id: int = Field(alias="_id")
+    stats: Stats
+
+    class Settings:
+        projection = {"_id": 1, "stats.streak": 1, "stats.submissions.score": 1}
+
+
+async def fetch_role_stats(
+    user_ids: set[int], lookup: dict[int, RoleStatsView]
+) -> None:
+    """
+    Fetch the stats that decide users' roles, in chunks, skipping the users that
+    were already fetched.
+
+    :param user_ids: The users' IDs.
+    :param lookup: The stats of each user, shared across guilds, that the fetched
+    stats are added to.
+    """
+    missing_ids = sorted(user_ids - lookup.keys())
+
+    for i in range(0, len(missing_ids), USER_LOOKUP_CHUNK_SIZE):
+        async for user in User.find(
+            In(User.id, missing_ids[i : i + USER_LOOKUP_CHUNK_SIZE])
+        ).project(RoleStatsView):
+            lookup[user.id] = user
+
+
+def get_tier(user: User | RoleStatsView) -> tuple[int, int]:
+    """
+    Get the streak and milestone tiers that a user has reached, which determine
+    their roles.
+
+    :param user: The user.
+
+    :return: The number of streak and milestone thresholds reached.
+    """
+    return (
+        bisect_right(STREAK_THRESHOLDS, user.stats.streak),
+        bisect_right(MILESTONE_THRESHOLDS, user.stats.submissions.score),
+    )
+
+
+class RoleIndex:
+    """
+    Index of the roles managed by the bot in a guild, so that members' roles are
+    resolved without scanning the guild's roles.
+
+    :param guild: The guild.
+    """
+
+    def __init__(self, guild: discord.Guild) -> None:
+        roles_by_name = {role.name: role for role in guild.roles}
+
+        self.verified_role = roles_by_name.get(VERIFIED_ROLE)
+        self.streak_roles = [
+            roles_by_name.get(STREAK_ROLES[threshold][0])
+            for threshold in STREAK_THRESHOLDS
+        ]
+        self.milestone_roles = [
+            roles_by_name.get(MILESTONE_ROLES[threshold][0])
+            for threshold in MILESTONE_THRESHOLDS
+        ]
+
+        self.managed_roles = {
+            role
+            for role in [
+                self.verified_role,
+                *self.streak_roles,
+                *self.milestone_roles,
+            ]
+            if role
+        }
+
+    def desired_roles(self, user: User | RoleStatsView) -> set[discord.Role]:
+        """
+        Get the roles managed by the bot that a registered user should have.
+
+        :param user: The user.
+
+        :return: The verified role, and the streak and milestone roles reached.
+        """
+        streak_tier, milestone_tier = get_tier(user)
+
+        roles = {self.verified_role}
+        if streak_tier:
+            roles.add(self.streak_roles[streak_tier - 1])
+        if milestone_tier:
+            roles.add(self.milestone_roles[milestone_tier - 1])
+        roles.discard(None)
+
+        return roles
+
+
+# Role index of each guild, dropped whenever the guild's roles change.
+role_indexes: dict[int, RoleIndex] = {}
+
+
+def get_role_index(guild: discord.Guild) -> RoleIndex:
+    """
+    Get the role index of a guild, building it if it isn't cached.
+
+    :param guild: The guild.
+
+    :return: The role index.
+    """
+    if guild.id not in role_indexes:
+        role_indexes[guild.id] = RoleIndex(guild)
+
+    return role_indexes[guild.id]
+
+
+def invalidate_role_index(guild_id: int) -> None:
+    """
+    Drop the cached role index of a guild, after a role was created, updated or
+    deleted.
+
+    :param guild_id: The guild's ID.
+    """
+    role_indexes.pop(guild_id, None)
+
+
+async def update_roles(
+    guild: discord.Guild,
+    server_id: int,
+    limiter: RateLimiter | None = None,
+    lookup: dict[int, RoleStatsView] | None = None,
+) -> int:
     """
     Update roles for users in the server based on their stats.
 
     :param guild: The guild in which to update the roles.
     :param server_id: The id of the server to update its roles.
+    :param limiter: The limiter that role edits wait for, if any.
+    :param lookup: The users' stats already fetched, e.g. for other guilds, which
+    this guild's users are added to.
+
+    :return: The number of members whose roles were changed.
     """
     if not guild.me.guild_permissions.manage_roles:
-        return
+        return 0
+
+    if lookup is None:
+        lookup = {}
+
+    members = await fetch_members(
+        guild, await Preference.distinct("user_id", {"server_id": server_id})
+    )
+    await fetch_role_stats(set(members), lookup)
+
+    role_index = get_role_index(guild)
+    edited = 0
 
-    async for preference in Preference.find_many(Preference.server_id == server_id):
-        user = await User.find_one(User.id == preference.user_id)
+    for member in members.values():
+        user = lookup.get(member.id)
 
         if not user:
             # This shouldn't happen
             continue
 
-        member = guild.get_member(user.id)
-
-        if not member:
+        try:
+            edited += await sync_member_roles(role_index, member, user, limiter)
+        except discord.errors.Forbidden:
+            # The member's top role is above the bot's.
             continue
 
-        await give_verified_role(guild, member)
-        await give_streak_role(guild, member, user.stats.streak)
-        await give_milestone_role(guild, member, user.stats.submissions.score)
-
+    return edited
 
-async def give_verified_role(guild: discord.Guild, member: discord.Member) -> None:
-    """
-    Give the verified role to a member.
 
-    :param guild: The guild in which to give the role.
-    :param member: The member to whom to give the role.
+async def sync_member_roles(
+    role_index: RoleIndex,
+    member: discord.Member,
+    user: User | RoleStatsView,
+    limiter: RateLimiter | None = None,
+) -> bool:
     """
-    role = discord.utils.get(guild.roles, name=VERIFIED_ROLE)
-
-    # Check if the role exists
-    if not role:
-        return
-
-    await member.add_roles(role)
+    Give a member exactly the roles managed by the bot that they should have, with a
+    single edit, and only if their roles differ.
 
+    :param role_index: The role index of the member's guild.
+    :param member: The member.
+    :param user: The member's user.
+    :param limiter: The limiter that the edit waits for, if any.
 
-async def give_streak_role(
-    guild: discord.Guild, member: discord.Member, streak: int
-) -> None:
+    :return: Whether the member's roles were changed.
     """
-    Give a streak role to a user based on their streak.
+    current_roles = set(member.roles)
+    roles = (current_roles - role_index.managed_roles) | role_index.desired_roles(user)
 
-    :param guild: The guild in which to give the role.
-    :param member: The member to whom to give the role.
-    :param streak: The streak of the user.
-    """
-    role_to_assign = None
+    if roles == current_roles:
+        return False
 
-    for role_streak, (role_name, _) in STREAK_ROLES.items():
-        if streak >= role_streak:
-            role_to_assign = discord.utils.get(guild.roles, name=role_name)
-        else:
-            break
+    if limiter:
+        await limiter.acquire()
 
-    # Remove all other roles.
-    for role_milestone, _ in STREAK_ROLES.items():
-        role_name, _ = STREAK_ROLES[role_milestone]
-        role = discord.utils.get(guild.roles, name=role_name)
-        if role and role in member.roles:
-            await member.remove_roles(role)
+    await member.edit(roles=[role for role in roles if not role.is_default()])
 
-    if role_to_assign:
-        # Give the member the appropriate role.
-        await member.add_roles(role_to_assign)
+    return True
 
 
-async def give_milestone_role(
-    guild: discord.Guild, member: discord.Member, total_solved: int
+async def give_member_roles(
+    guild: discord.Guild, member: discord.Member, user: User
 ) -> None:
     """
-    Give a milestone role to a user based on their total solved milestones.
+    Give a member who just registered or connected their account to the guild the
+    verified role and the roles of their tiers, instead of waiting for the weekly
+    role sweep.
 
-    :param guild: The guild in which to give the role.
-    :param member: The member to whom to give the role.
-    :param total_solved: The total solved milestones of the user.
+    :param guild: The guild in which to give the roles.
+    :param member: The member to whom to give the roles.
+    :param user: The member's user.
     """
-    role_to_assign = None
-
-    for role_milestone, (role_name, _) in MILESTONE_ROLES.items():
-        if total_solved >= role_milestone:
-            role_to_assign = discord.utils.get(guild.roles, name=role_name)
-
-    # Remove all other roles
-    for role_milestone, _ in MILESTONE_ROLES.items():
-        role_name, _ = MILESTONE_ROLES[role_milestone]
-        role = discord.utils.get(guild.roles, name=role_name)
-        if role and role in member.roles:
-            await member.remove_roles(role)
+    if not guild.me.guild_permissions.manage_roles:
+        return
 
-    if role_to_assign:
-        # Give the member the appropriate role
-        await member.add_roles(role_to_assign)
+    try:
+        await sync_member_roles(get_role_index(guild), member, user)
+    except discord.errors.Forbidden:
+        # The member's top role is above the bot's.
+        pass
@@ -0,0 +1,223 @@
+from typing import TYPE_CHECKING
+
+import numpy as np
+from pydantic import BaseModel, Field
+
+from constants import Period
+from database.models import Preference, User
+from utils.leaderboards import get_period_timestamps
+from utils.records import fetch_first_scores
+
+if TYPE_CHECKING:
+    # To prevent circular imports
+    from bot import DiscordBot
+
+# Marks a baseline score for which no record exists.
+MISSING = -1
+
+PERIODS = (Period.DAY, Period.WEEK, Period.MONTH)
+
+
+class UserScoreView(BaseModel):
+    id: int = Field(alias="_id")
+    score: int
+
+    class Settings:
+        projection = {"_id": 1, "score": "$stats.submissions.score"}
+
+
+class MembershipView(BaseModel):
+    user_id: int
+    server_id: int
+
+
+class ScoreTable:
+    """
+    Array-backed table of every user's score and their score at the start of the
+    current and previous periods.
+
+    Each user is assigned a row index, and each column is a NumPy array, so period
+    scores of a whole leaderboard are computed with vectorised subtractions instead
+    of loading every user's records.
+    """
+
+    def __init__(self, bot: "DiscordBot") -> None:
+        self.bot = bot
+        self.user_ids = np.empty(0, dtype=np.int64)
+        self.scores = np.empty(0, dtype=np.int64)
+        # Score at the start of the current period, per period.
+        self.baselines: dict[Period, np.ndarray] = {
+            period: np.empty(0, dtype=np.int64) for period in PERIODS
+        }
+        # Score at the start of the previous period, per period.
+        self.previous_baselines: dict[Period, np.ndarray] = {
+            period: np.empty(0, dtype=np.int64) for period in PERIODS
+        }
+        self.index_of: dict[int, int] = {}
+        # Row indices of the users on each server's leaderboard.
+        self.members: dict[int, np.ndarray] = {}
+
+    async def load(self) -> None:
+        """
+        Rebuild the table from the database.
+        """
+        users = await User.find_all().project(UserScoreView).to_list()
+
+        user_ids = np.fromiter((user.id for user in users), np.int64, len(users))
+        scores = np.fromiter((user.score for user in users), np.int64, len(users))
+        index_of = {int(user_id): i for i, user_id in enumerate(user_ids)}
+
+        windows = []
+        for period in PERIODS:
+            previous_start, current_start = get_period_timestamps(period)
+            windows += [(current_start, None), (previous_start, current_start)]
+
+        columns = [
+            self._to_column(index_of, first_scores)
+            for first_scores in await fetch_first_scores(
+                windows, self.bot.config.RECORD_BUCKETS
+            )
+        ]
+        baselines = dict(zip(PERIODS, columns[0::2]))
+        previous_baselines = dict(zip(PERIODS, columns[1::2]))
+
+        server_to_indices: dict[int, list[int]] = {}
+        async for membership in Preference.find_all().project(MembershipView):
+            if (i := index_of.get(membership.user_id)) is not None:
+                server_to_indices.setdefault(membership.server_id, []).append(i)
+
+        self.user_ids = user_ids
+        self.scores = scores
+        self.index_of = index_of
+        self.baselines = baselines
+        self.previous_baselines = previous_baselines
+        self.members = {
+            server_id: np.array(indices, dtype=np.int64)
+            for server_id, indices in server_to_indices.items()
+        }
+
+        self.bot.logger.info(f"Score table loaded with {len(user_ids)} users")
+
+    @staticmethod
+    def _to_column(index_of: dict[int, int], scores: dict[int, int]) -> np.ndarray:
+        """
+        Arrange users' scores into a column of the table.
+
+        :param index_of: The row index of each user.
+        :param scores: The score of each user.
+
+        :return: The column of scores, with `MISSING` for users without a score.
+        """
+        column = np.full(len(index_of), MISSING, dtype=np.int64)
+
+        for user_id, score in scores.items():
+            if (i := index_of.get(user_id)) is not None:
+                column[i] = score
+
+        return column
+
+    def add_user(self, user: User) -> int:
+        """
+        Add a user that registered since the table was loaded.
+
+        Registering stores a record of the user's current score, so their baseline
+        for the current periods is their current score.
+
+        :param user: The user to add.
+
+        :return: The user's row index.
+        """
+        i = len(self.user_ids)
+        score = user.stats.submissions.score
+
+        self.user_ids = np.append(self.user_ids, user.id)
+        self.scores = np.append(self.scores, score)
+        for period in PERIODS:
+            self.baselines[period] = np.append(self.baselines[period], score)
+            self.previous_baselines[period] = np.append(
+                self.previous_baselines[period], MISSING
+            )
+        self.index_of[user.id] = i
+
+        return i
+
+    def period_scores(
+        self, indices: np.ndarray, period: Period, previous: bool
+    ) -> np.ndarray:
+        """
+        Compute the scores of a set of users for a given period.
+
+        :param indices: The row indices of the users.
+        :param period: The period for which to compute the scores.
+        :param previous: Whether to compute the scores of one period before.
+
+        :return: The scores, in the same order as `indices`.
+        """
+        if period == Period.ALLTIME:
+            return self.scores[indices]
+
+        if previous:
+            start = self.previous_baselines[period][indices]
+            end = self.baselines[period][indices]
+        else:
+            start = self.baselines[period][indices]
+            end = self.scores[indices]
+
+        return np.where((start != MISSING) & (end != MISSING), end - start, 0)
+
+    def sort_users(
+        self, users: list[User], period: Period, previous: bool
+    ) -> list[tuple[User, int]]:
+        """
+        Sort users by their score for a given period.
+
+        :param users: The users to sort.
+        :param period: The period for which to sort the scores.
+        :param previous: Whether to sort by the scores of one period before.
+
+        :return: A list of users and their scores, sorted by score in descending
+        order.
+        """
+        indices = np.fromiter(
+            (self.index_of.get(user.id, -1) for user in users), np.int64, len(users)
+        )
+
+        for position in np.flatnonzero(indices == -1):
+            indices[position] = self.add_user(users[position])
+
+        # The users were just fetched, so their scores are the most recent ones.
+        self.scores[indices] = [user.stats.submissions.score for user in users]
+
+        scores = self.period_scores(indices, period, previous)
+        order = np.argsort(-scores, kind="stable")
+
+        return [(users[i], int(scores[i])) for i in order]
+
+    def top(
+        self, server_id: int, period: Period, previous: bool, k: int
+    ) -> list[tuple[int, int]]:
+        """
+        Get the `k` highest scoring users on a server's leaderboard.
+
+        :param server_id: The server's ID.
+        :param period: The period for which to rank the scores.
+        :param previous: Whether to rank by the scores of one period before.
+        :param k: The number of users to get.
+
+        :return: A list of user IDs and their scores, sorted by score in descending
+        order.
+        """
+        indices = self.members.get(server_id)
+        if indices is None or len(indices) == 0:
+            return []
+
+        scores = self.period_scores(indices, period, previous)
+
+        if len(indices) > k:
+            top_k = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top_k = np.arange(len(indices))
+
+        top_k = top_k[np.argsort(-scores[top_k], kind="stable")]
+
+        return [(int(self.user_ids[indices[i]]), int(scores[i])) for i in top_k]
@@ -9,7 +9,6 @@ import requests
 from constants import StatsCardExtensions
 from database.models import (
     LanguageProblemCount,
-    Record,
     SkillProblemCount,
     SkillsProblemCount,
     Submissions,
@@ -17,6 +16,9 @@ from database.models import (
 )
 from utils.common import to_thread
 from utils.problems import fetch_problems_solved_and_rank
+from utils.records import save_daily_record
+from utils.roles import get_tier
+from utils.streaks import update_streak
 
 if TYPE_CHECKING:
     # To prevent circular imports
@@ -48,6 +50,8 @@ async def update_stats(
     if not user:
         return
 
+    tier = get_tier(user)
+
     (
         user.stats.submissions.easy,
         user.stats.submissions.medium,
@@ -61,6 +65,9 @@ async def update_stats(
     )
 
     if reset_day:
+        today = datetime.now(UTC).replace(hour=0, minute=0, second=0, microsecond=0)
+        update_streak(user.stats, today)
+
         languages_problem_count = list(
             map(
                 lambda x: LanguageProblemCount(
@@ -91,22 +98,21 @@ async def update_stats(
             ),
         )
 
-        record = Record(
-            timestamp=datetime.now(UTC).replace(
-                hour=0, minute=0, second=0, microsecond=0
-            ),
-            user_id=user.id,
-            submissions=Submissions(
+        await save_daily_record(
+            user.id,
+            today,
+            Submissions(
                 easy=stats.submissions.easy,
                 medium=stats.submissions.medium,
                 hard=stats.submissions.hard,
                 score=stats.submissions.score,
             ),
-            languages_problem_count=languages_problem_count,
-            skills_problem_count=skills_problem_count,
+            languages_problem_count,
+            skills_problem_count,
         )
 
-        await record.create()
+    if get_tier(user) != tier:
+        bot.role_sync_queue.tier_changed(user.id)
 
     user.last_updated = datetime.now(UTC)
     await user.save()
@@ -0,0 +1,116 @@
+from datetime import datetime, timedelta
+
+from pymongo import UpdateOne
+
+from database.models import Record, Stats, Submissions, User
+
+# Number of users updated per bulk write during the backfill.
+BACKFILL_BATCH_SIZE = 500
+
+
+def problems_solved(submissions: Submissions) -> int:
+    """
+    Count the problems solved, whatever their difficulty.
+
+    :param submissions: The submissions.
+
+    :return: The number of problems solved.
+    """
+    return submissions.easy + submissions.medium + submissions.hard
+
+
+def update_streak(stats: Stats, day: datetime) -> None:
+    """
+    Update the streak at the daily reset, from the problems solved since the
+    previous reset. The streak grows by one if a new problem was solved and is
+    broken otherwise.
+
+    If resets were missed (e.g. the bot was down over midnight), the problems solved
+    can't be attributed to each day, so the streak starts over from the latest day.
+
+    Applying the same day's reset again does nothing, and the first reset only
+    records the number of problems solved.
+
+    :param stats: The user's stats, with their current submissions.
+    :param day: The start of the day that the reset starts.
+    """
+    day = day.replace(tzinfo=None)
+    if stats.streak_day and stats.streak_day.replace(tzinfo=None) >= day:
+        return
+
+    solved = problems_solved(stats.submissions)
+
+    if stats.streak_solved is not None:
+        if solved <= stats.streak_solved:
+            stats.streak = 0
+        elif day - stats.streak_day.replace(tzinfo=None) > timedelta(days=1):
+            stats.streak = 1
+        else:
+            stats.streak += 1
+
+    stats.streak_solved = solved
+    stats.streak_day = day
+
+
+async def backfill_streaks() -> int:
+    """
+    Seed every user's streak from their daily records, streaming them in order
+    instead of loading each user's history.
+
+    Days without a record break the streak, so this should run before old daily
+    records are rolled up.
+
+    :return: The number of users updated.
+    """
+    collection = User.get_motor_collection()
+    writes: list[UpdateOne] = []
+    updated = 0
+
+    def streak_update(user_id: int, stats: Stats) -> UpdateOne:
+        return UpdateOne(
+            {"_id": user_id},
+            {
+                "$set": {
+                    "stats.streak": stats.streak,
+                    "stats.streak_solved": stats.streak_solved,
+                    "stats.streak_day": stats.streak_day,
+                }
+            },
+        )
+
+    user_id: int | None = None
+    stats = Stats()
+
+    async for record in Record.find_all().sort(
+        +Record.user_id, +Record.timestamp, +Record.id
+    ):
+        if record.user_id != user_id:
+            if user_id is not None:
+                writes.append(streak_update(user_id, stats))
+
+            user_id = record.user_id
+            stats = Stats()
+
+        day = record.timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+
+        if stats.streak_day and day - stats.streak_day > timedelta(days=1):
+            # Without a record of the day before, the streak is unknown.
+            stats.streak = 0
+            stats.streak_solved = None
+
+        stats.submissions = record.submissions
+        update_streak(stats, day)
+
+        if len(writes) >= BACKFILL_BATCH_SIZE:
+            await collection.bulk_write(writes, ordered=False)
+            updated += len(writes)
+            writes = []
+
+    if user_id is not None:
+        writes.append(streak_update(user_id, stats))
+
+    if writes:
+        await collection.bulk_write(writes, ordered=False)
+        updated += len(writes)
+
+    return updated
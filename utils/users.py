@@ -5,9 +5,18 @@ from datetime import UTC, datetime
 from typing import TYPE_CHECKING
 
 import discord
+from beanie.operators import In
 
 from constants import GLOBAL_LEADERBOARD_ID
-from database.models import Preference, Record, Stats, Submissions, User
+from database.cache import preference_cache
+from database.models import (
+    Preference,
+    Record,
+    RecordBucket,
+    Stats,
+    Submissions,
+    User,
+)
 from ui.embeds.users import (
     connect_account_instructions_embed,
     profile_added_embed,
@@ -16,7 +25,9 @@ from ui.embeds.users import (
 )
 from utils.common import convert_to_score
 from utils.problems import fetch_problems_solved_and_rank
-from utils.roles import give_verified_role
+from utils.records import save_daily_record
+from utils.roles import give_member_roles
+from utils.streaks import update_streak
 
 if TYPE_CHECKING:
     # To prevent circular imports
@@ -58,6 +69,8 @@ async def register(
         hard=stats.submissions.hard,
     )
 
+    today = datetime.now(UTC).replace(hour=0, minute=0, second=0, microsecond=0)
+
     user = User(
         id=user_id,
         leetcode_id=leetcode_id,
@@ -70,17 +83,8 @@ async def register(
             )
         ),
     )
-
-    record = Record(
-        timestamp=datetime.now(UTC).replace(hour=0, minute=0, second=0, microsecond=0),
-        user_id=user_id,
-        submissions=Submissions(
-            easy=stats.submissions.easy,
-            medium=stats.submissions.medium,
-            hard=stats.submissions.hard,
-            score=score,
-        ),
-    )
+    # The streak starts counting from today.
+    update_streak(user.stats, today)
 
     preference_server = Preference(
         user_id=user_id,
@@ -98,11 +102,22 @@ async def register(
     )
 
     await user.save()
-    await record.create()
+    await save_daily_record(
+        user_id,
+        today,
+        Submissions(
+            easy=stats.submissions.easy,
+            medium=stats.submissions.medium,
+            hard=stats.submissions.hard,
+            score=score,
+        ),
+    )
     await preference_server.create()
     await preference_global.create()
+    preference_cache.invalidate(user_id, server_id)
+    preference_cache.invalidate(user_id, GLOBAL_LEADERBOARD_ID)
 
-    await give_verified_role(interaction.guild, interaction.user)
+    await give_member_roles(interaction.guild, interaction.user, user)
 
     await interaction.edit_original_response(embed=profile_added_embed(leetcode_id))
 
@@ -110,7 +125,7 @@ async def register(
 async def login(
     interaction: discord.Interaction,
     send_message: discord.Webhook,
-    user_id: int,
+    user: User,
     server_id: int,
     user_display_name: str,
 ) -> None:
@@ -118,16 +133,15 @@ async def login(
     Logs in a user to a server if user already exists.
 
     :param send_message: The webhook to send messages.
-    :param user_id: The user to log in.
+    :param user: The user to log in.
     :param server_id: The ID of the server to log the user into.
     :param user_display_name: The display name of the user.
     """
-    await give_verified_role(interaction.guild, interaction.user)
+    user_id = user.id
 
-    preference = await Preference.find_one(
-        Preference.user_id == user_id,
-        Preference.server_id == server_id,
-    )
+    await give_member_roles(interaction.guild, interaction.user, user)
+
+    preference = await preference_cache.get(user_id, server_id)
 
     if preference:
         # User has already been added to the server.
@@ -142,6 +156,7 @@ async def login(
         )
 
         await preference.create()
+        preference_cache.invalidate(user_id, server_id)
 
         embed = synced_existing_user_embed()
         await send_message(embed=embed)
@@ -200,6 +215,7 @@ async def unlink_user_from_server(user_id: int, server_id: int) -> None:
     await Preference.find_many(
         Preference.user_id == user_id, Preference.server_id == server_id
     ).delete()
+    preference_cache.invalidate(user_id, server_id)
 
 
 async def delete_user(user_id: int) -> None:
@@ -208,6 +224,44 @@ async def delete_user(user_id: int) -> None:
 
     :param user_id: The user's id.
     """
-    await Preference.find_many(Preference.user_id == user_id).delete()
-    await Record.find_many(Record.user_id == user_id).delete()
-    await User.find_one(User.id == user_id).delete()
+    await delete_users({user_id})
+
+
+async def delete_users(user_ids: set[int]) -> None:
+    """
+    Deletes all of the users' stored information, in one query per collection.
+
+    :param user_ids: The users' ids.
+    """
+    if not user_ids:
+        return
+
+    await Preference.find_many(In(Preference.user_id, user_ids)).delete()
+    await Record.find_many(In(Record.user_id, user_ids)).delete()
+    await RecordBucket.find_many(In(RecordBucket.user_id, user_ids)).delete()
+    await User.find_many(In(User.id, user_ids)).delete()
+
+    preference_cache.invalidate_users(user_ids)
+
+
+async def find_orphaned_users(user_ids: set[int]) -> set[int]:
+    """
+    Finds the users that are no longer on any server's leaderboard, other than the
+    global leaderboard.
+
+    :param user_ids: The users' ids to check.
+
+    :return: The ids of the users without any server preferences.
+    """
+    if not user_ids:
+        return set()
+
+    linked_user_ids = {
+        linked["_id"]
+        async for linked in Preference.find_many(
+            In(Preference.user_id, user_ids),
+            Preference.server_id != GLOBAL_LEADERBOARD_ID,
+        ).aggregate([{"$group": {"_id": "$user_id"}}])
+    }
+
+    return user_ids - linked_user_ids
@@ -0,0 +1,230 @@
+import asyncio
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+import discord
+from beanie.odm.operators.update.general import Set
+from beanie.operators import In
+
+from constants import Period
+from database.models import Preference, Server, User, Winner, Winners
+from ui.embeds.leaderboards import empty_leaderboard_embed, leaderboard_embed
+from utils.fanout import fan_out
+from utils.leaderboards import get_period_timestamps, get_rank_emoji, get_winners_title
+
+if TYPE_CHECKING:
+    # To prevent circular imports
+    from bot import DiscordBot
+
+# Maximum number of servers whose winners are computed at the same time.
+MAX_CONCURRENT_COMPUTATIONS = 8
+
+# Number of top ranked users considered for the podium, allowing for ties.
+PODIUM_CANDIDATES = 10
+
+
+def get_podium(
+    user_id_to_preference: dict[int, Preference],
+    user_id_to_user: dict[int, User],
+    ranked_users: list[tuple[int, int]],
+) -> list[Winner]:
+    """
+    Get the users placed in the top three of a ranked leaderboard.
+
+    Users with the same score share a place, so the podium can hold more than three
+    users. Users that didn't score any points are never winners.
+
+    :param user_id_to_preference: The preferences of the users, keyed by user ID.
+    :param user_id_to_user: The users, keyed by user ID.
+    :param ranked_users: The user IDs and scores, sorted by score in descending order.
+
+    :return: The winners.
+    """
+    winners: list[Winner] = []
+
+    place = 0
+    prev_score = float("-inf")
+
+    for user_id, score in ranked_users:
+        preference = user_id_to_preference.get(user_id)
+        user = user_id_to_user.get(user_id)
+
+        if not preference or not user:
+            continue
+
+        if score != prev_score:
+            place += 1
+
+        if score == 0 or place == 4:
+            break
+
+        prev_score = score
+
+        winners.append(
+            Winner(
+                user_id=user_id,
+                name=preference.name,
+                profile_url=(
+                    f"https://leetcode.com/{user.leetcode_id}"
+                    if preference.url
+                    else None
+                ),
+                score=score,
+                place=place,
+            )
+        )
+
+    return winners
+
+
+async def compute_winners(
+    bot: "DiscordBot", server: Server, period: Period
+) -> Winners | None:
+    """
+    Compute the winners of the previous period for a server and store them in the
+    winners history.
+
+    :param server: The server to compute the winners for.
+    :param period: The period that just ended.
+
+    :return: The winners, or `None` if nobody is on the server's leaderboard.
+    """
+    ranked_users = bot.score_table.top(
+        server.id, period, previous=True, k=PODIUM_CANDIDATES
+    )
+
+    if not ranked_users:
+        return None
+
+    user_ids = [user_id for user_id, _ in ranked_users]
+    preferences = await Preference.find_many(
+        Preference.server_id == server.id, In(Preference.user_id, user_ids)
+    ).to_list()
+    users = await User.find_many(In(User.id, user_ids)).to_list()
+
+    timestamp, _ = get_period_timestamps(period)
+    winners = Winners(
+        server_id=server.id,
+        period=period,
+        timestamp=timestamp,
+        winners=get_podium(
+            {preference.user_id: preference for preference in preferences},
+            {user.id: user for user in users},
+            ranked_users,
+        ),
+    )
+
+    # Upserted so that rerunning a reset overwrites the period's winners instead of
+    # duplicating them.
+    await Winners.find_one(
+        Winners.server_id == server.id,
+        Winners.period == period,
+        Winners.timestamp == timestamp,
+    ).upsert(Set({Winners.winners: winners.winners}), on_insert=winners)
+
+    return winners
+
+
+def winners_embed(server: Server, winners: Winners | None) -> discord.Embed:
+    """
+    Build the embed announcing a server's winners.
+
+    :param server: The server the winners belong to.
+    :param winners: The winners, or `None` if nobody is on the server's leaderboard.
+
+    :return: The winners embed.
+    """
+    if not winners:
+        return empty_leaderboard_embed()
+
+    leaderboard = []
+    for winner in winners.winners:
+        display_name = (
+            f"[{winner.name}]({winner.profile_url})"
+            if winner.profile_url
+            else winner.name
+        )
+        rank = get_rank_emoji(winner.place, winner.score)
+        leaderboard.append(f"**{rank} {display_name}** - **{winner.score}** pts")
+
+    return leaderboard_embed(
+        server,
+        0,
+        1,
+        get_winners_title(winners.period),
+        "\n".join(leaderboard),
+        include_page_count=False,
+    )
+
+
+async def send_leaderboard_winners(
+    bot: "DiscordBot", servers: list[Server], period: Period
+) -> None:
+    """
+    Compute the leaderboard winners of each server once and send them to the winners
+    channels of this cluster's servers.
+
+    :param servers: The servers to send the leaderboard winners for.
+    :param period: The period for which the leaderboard is being sent (e.g., weekly,
+    monthly).
+    """
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_COMPUTATIONS)
+
+    async def compute(server: Server) -> None:
+        async with semaphore:
+            await compute_winners(bot, server, period)
+
+    # Computed for every server, since the other clusters deliver the stored winners
+    # to their own servers.
+    await asyncio.gather(*(compute(server) for server in servers))
+
+    await deliver_winners(bot, servers, period)
+
+
+async def deliver_winners(
+    bot: "DiscordBot",
+    servers: list[Server],
+    period: Period,
+    now: datetime | None = None,
+) -> None:
+    """
+    Send the stored leaderboard winners of the previous period to the winners
+    channels of this cluster's servers.
+
+    :param servers: The servers to send the leaderboard winners for.
+    :param period: The period for which the leaderboard is being sent.
+    :param now: The time of the reset, defaulting to the current time.
+    """
+    servers = [
+        server
+        for server in servers
+        if server.channels.winners and bot.owns_guild(server.id)
+    ]
+    if not servers:
+        return
+
+    timestamp, _ = get_period_timestamps(period, now)
+    server_id_to_winners = {
+        winners.server_id: winners
+        async for winners in Winners.find(
+            In(Winners.server_id, [server.id for server in servers]),
+            Winners.period == period,
+            Winners.timestamp == timestamp,
+        )
+    }
+    embeds = [
+        winners_embed(server, server_id_to_winners.get(server.id)) for server in servers
+    ]
+
+    deliveries = [
+        (server.id, channel_id, {"embed": embed, "silent": True})
+        for server, embed in zip(servers, embeds)
+        for channel_id in server.channels.winners
+    ]
+
+    sent = await fan_out(bot, deliveries, "leaderboard winners")
+
+    bot.logger.info(
+        f"{period.value} leaderboard winners sent to {sent} / {len(deliveries)} "
+        "channels"
+    )